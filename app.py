@@ -1,14 +1,60 @@
+import time
+IMPORT_STARTED = time.perf_counter()  # Measured before anything else so startup logs show the full import cost
+
 import os
+import glob
+import math
+import asyncio
+import contextlib
 import shutil
 import subprocess
 import sys
-import pandas as pd
-from fastapi import FastAPI, File, UploadFile
+from typing import List
+import numpy as np
+from fastapi import FastAPI, File, UploadFile, Query, Request, Body
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
+from face_gallery import FaceGallery
+from job_events import JOBS, JobScheduler, create_job, format_sse
+from evidence_clips import cut_clip
+from archive_ingest import ARCHIVES, Archive, ArchiveStream, iter_archive_videos, iter_stream_videos
+from roi import CAMERA_PROFILE_DIR, load_roi, save_roi
+from watchlist import Watchlist, load_watchlist
+from iot_capture import CaptureIndex, iter_events, export_csv
+from correlation import (load_plate_detections, face_times, load_face_detections, load_csv_events, within_radius,
+                         csv_event_source, capture_event_source, combine_sources, merge_windows, window_join,
+                         correlate)
+import engines
+
+IMPORT_SECONDS = time.perf_counter() - IMPORT_STARTED
+print(f"Server modules imported in {IMPORT_SECONDS:.3f}s")
+
+# Engines listed here (comma separated) are loaded in the background once the server is up
+WARMUP_ENGINES = [name for name in os.environ.get("CHAKSHU_WARMUP_ENGINES", "").split(",") if name.strip()]
+
+server_state = {"started_at": None, "startup_s": None, "warming_up": False}
 
-app = FastAPI()
+async def warm_up_engines(names):
+    server_state["warming_up"] = True
+    try:
+        await asyncio.to_thread(engines.warm_up, [name.strip() for name in names])
+    finally:
+        server_state["warming_up"] = False
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    server_state["started_at"] = time.time()
+    server_state["startup_s"] = round(time.perf_counter() - IMPORT_STARTED, 3)
+    print(f"Server ready in {server_state['startup_s']:.3f}s (imports {IMPORT_SECONDS:.3f}s)")
+    if WARMUP_ENGINES:
+        # Warm up without blocking readiness; requests that need an engine load it on demand anyway
+        task = asyncio.create_task(warm_up_engines(WARMUP_ENGINES))
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+    yield
+
+app = FastAPI(lifespan=lifespan)
 
 # Enable CORS so that your React frontend can talk to the backend
 app.add_middleware(
@@ -23,22 +69,49 @@ app.add_middleware(
 UPLOAD_DIR = "uploads"               # For video uploads
 IMAGE_FOLDER = "dashcam_analysis"    # Where dash3.py saves images
 CSV_UPLOAD_DIR = "csv_uploads"       # Directory to store CSV files
+GALLERY_DIR = "face_gallery"         # Persistent cross-case face gallery
+CLIPS_DIR = "evidence_clips"         # Cached clips cut around detections
+ARCHIVE_DIR = "archives"             # Uploaded DVR export archives
+WATCHLIST_DIR = "watchlist"          # Plates of wanted vehicles
+WATCHLIST_FILE = os.path.join(WATCHLIST_DIR, "watchlist.csv")
+CAPTURE_DIR = "captures"             # Raw btsnoop/pcap captures from IoT and Bluetooth devices
 
 # Ensure directories exist
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 os.makedirs(IMAGE_FOLDER, exist_ok=True)
 os.makedirs(CSV_UPLOAD_DIR, exist_ok=True)
+os.makedirs(ARCHIVE_DIR, exist_ok=True)
+os.makedirs(CAMERA_PROFILE_DIR, exist_ok=True)
+os.makedirs(WATCHLIST_DIR, exist_ok=True)
+os.makedirs(CAPTURE_DIR, exist_ok=True)
 
 # Mount directories for serving static files
 app.mount("/dashcam_analysis", StaticFiles(directory=IMAGE_FOLDER), name="dashcam_analysis")
 
+# Shared gallery of every unique face recorded by the face extractors
+face_gallery = FaceGallery(GALLERY_DIR)
+
 # Use the Python executable from the active virtual environment
 VENV_PYTHON = sys.executable
 
+# Background analysis runs on a fixed number of workers so bulk uploads cannot overload the host
+ANALYSIS_WORKERS = 2
+scheduler = JobScheduler(workers=ANALYSIS_WORKERS)
+
+# Keep references to fire-and-forget tasks so they are not garbage collected
+background_tasks = set()
+
 # ------------------------------ VIDEO UPLOAD & PROCESSING ------------------------------
 
+def save_upload(source, path, mode="xb"):
+    """Copy an uploaded file to disk; large uploads are copied on a worker thread with to_thread."""
+    with open(path, mode) as buffer:
+        shutil.copyfileobj(source, buffer)
+
 @app.post("/upload/")
-async def upload_video(file: UploadFile = File(...)):
+def upload_video(file: UploadFile = File(...)):
+    # A plain def runs in FastAPI's thread pool, so waiting for the analysis does not
+    # stall live job streams or the job scheduler on the event loop
     file_path = os.path.join(UPLOAD_DIR, file.filename)
     with open(file_path, "wb") as buffer:
         shutil.copyfileobj(file.file, buffer)
@@ -56,16 +129,288 @@ async def upload_video(file: UploadFile = File(...)):
 
 @app.get("/images/")
 def list_images():
-    image_files = [f for f in os.listdir(IMAGE_FOLDER) if f.lower().endswith((".png", ".jpg", ".jpeg"))]
+    # Frames of /upload/ runs sit in the top folder, those of analysis jobs in <job_id>/
+    image_files = [os.path.relpath(f, IMAGE_FOLDER).replace(os.sep, "/")
+                   for pattern in ("*", os.path.join("*", "frame_*"))
+                   for f in sorted(glob.glob(os.path.join(IMAGE_FOLDER, pattern)))
+                   if f.lower().endswith((".png", ".jpg", ".jpeg"))]
     return {"images": image_files}
 
-@app.get("/images/{image_name}")
+@app.get("/images/{image_name:path}")
 def get_image(image_name: str):
-    image_path = os.path.join(IMAGE_FOLDER, image_name)
-    if os.path.exists(image_path):
+    image_path = os.path.abspath(os.path.join(IMAGE_FOLDER, image_name))
+    if image_path.startswith(os.path.abspath(IMAGE_FOLDER) + os.sep) and os.path.isfile(image_path):
         return FileResponse(image_path)
     return JSONResponse(content={"error": "Image not found"}, status_code=404)
 
+# ------------------------------ ANALYSIS JOBS & LIVE EVENTS ------------------------------
+
+def analysis_command(video_path, output_dir, camera=None, start_time=None):
+    # Jobs run concurrently, so each one writes its log, frames and crops to its own folder
+    command = [VENV_PYTHON, "dash3.py", video_path, "--events", "--output-dir", output_dir]
+    if camera:
+        command += ["--camera", camera]
+    if start_time:
+        command += ["--start-time", start_time]
+    if os.path.exists(WATCHLIST_FILE):
+        command += ["--watchlist", WATCHLIST_FILE]
+    return command
+
+@app.post("/jobs/")
+async def create_analysis_job(file: UploadFile = File(...), priority: int = Query(0),
+                              camera: str = Query(None), start_time: str = Query(None)):
+    """
+    Upload a video and queue it for analysis in the background (lower priority runs first).
+    If a camera is given, only that camera's region of interest is scanned.
+    start_time (unix seconds or ISO 8601) places detections on the evidence timeline;
+    without it the start is estimated from the upload and flagged as such.
+    Progress and detections can be followed live on /jobs/{job_id}/events.
+    """
+    job = create_job(None, IMAGE_FOLDER)
+    # DVR files are routinely named alike (00001.dav, cam1.mp4); the job id keeps a later
+    # upload from replacing a video that is still queued or being analysed
+    file_path = os.path.join(UPLOAD_DIR, f"{job.id[:8]}_{os.path.basename(file.filename)}")
+    await asyncio.to_thread(save_upload, file.file, file_path)
+    job.video_path = os.path.abspath(file_path)
+
+    scheduler.submit(job, analysis_command(file_path, job.output_dir, camera, start_time), priority=priority)
+
+    return {"job_id": job.id, "events_url": f"/jobs/{job.id}/events", "status_url": f"/jobs/{job.id}"}
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    job = JOBS.get(job_id)
+    if job is None:
+        return JSONResponse(content={"error": "Job not found"}, status_code=404)
+    summary = job.summary()
+    summary["output"] = list(job.output)
+    return summary
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, request: Request):
+    """
+    Server-Sent Events stream of a job's progress and detections.
+    Reconnecting clients resume after the Last-Event-ID they received.
+    """
+    job = JOBS.get(job_id)
+    if job is None:
+        return JSONResponse(content={"error": "Job not found"}, status_code=404)
+
+    last_event_id = request.headers.get("last-event-id")
+    start = int(last_event_id) + 1 if last_event_id and last_event_id.isdigit() else 0
+
+    async def event_stream():
+        async for event in job.stream(start):
+            if await request.is_disconnected():
+                break
+            yield format_sse(event)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# ------------------------------ ARCHIVE INGESTION ------------------------------
+
+async def ingest_archive(archive, videos, priority, camera=None):
+    """
+    Queue an analysis job for every video an archive iterator extracts, as soon as it is written.
+    """
+    try:
+        while True:
+            # Each entry is extracted on a worker thread so the server stays responsive
+            video_path = await asyncio.to_thread(next, videos, None)
+            if video_path is None:
+                break
+            job = create_job(os.path.abspath(video_path), IMAGE_FOLDER)
+            archive.jobs.append(job)
+            scheduler.submit(job, analysis_command(video_path, job.output_dir, camera), priority=priority)
+        archive.status = "unpacked"
+    except Exception as e:
+        archive.status = "failed"
+        archive.error = str(e)
+    finally:
+        videos.close()
+
+def start_ingest(archive, videos, priority, camera=None):
+    """Register an archive and queue its videos for analysis in the background."""
+    ARCHIVES[archive.id] = archive
+    task = asyncio.create_task(ingest_archive(archive, videos, priority, camera))
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+def store_chunk(copy, stream, chunk):
+    """Append an upload chunk to the archive copy and hand it to the extractor."""
+    copy.write(chunk)
+    stream.feed(chunk)
+
+@app.post("/upload_archive/")
+async def upload_archive(request: Request, priority: int = Query(0), camera: str = Query(None),
+                         name: str = Query(None)):
+    """
+    Upload a zip/tar DVR export; every video inside becomes its own analysis job.
+
+    Send the archive as a multipart "file" field, or as the raw request body with
+    ?name=. A raw tar body is unpacked while it uploads, so the first cameras are
+    queued for analysis before the upload has finished; zips need their central
+    directory and are unpacked once complete. Progress for the whole archive is
+    reported by /archives/{archive_id}.
+    """
+    if request.headers.get("content-type", "").startswith("multipart/form-data"):
+        form = await request.form()
+        file = form.get("file")
+        if file is None or isinstance(file, str):
+            return JSONResponse(content={"error": "No archive file in the upload"}, status_code=400)
+        archive = Archive(file.filename)
+        archive_path = os.path.join(ARCHIVE_DIR, f"{archive.id[:8]}_{os.path.basename(file.filename)}")
+        await asyncio.to_thread(save_upload, file.file, archive_path)
+        start_ingest(archive, iter_archive_videos(archive_path, UPLOAD_DIR, archive.id[:8]), priority, camera)
+        return {"archive_id": archive.id, "status_url": f"/archives/{archive.id}"}
+
+    archive = Archive(os.path.basename(name or "archive"))
+    archive_path = os.path.join(ARCHIVE_DIR, f"{archive.id[:8]}_{archive.name}")
+    chunks = request.stream()
+    first = b""
+    async for first in chunks:
+        if first:
+            break
+    if archive.name.lower().endswith(".zip") or first.startswith(b"PK\x03\x04"):
+        stream = None
+    else:
+        stream = ArchiveStream()
+        start_ingest(archive, iter_stream_videos(stream, UPLOAD_DIR, archive.id[:8]), priority, camera)
+
+    async def received():
+        yield first
+        async for chunk in chunks:
+            yield chunk
+
+    # The archive itself is kept as received; tar entries are extracted from the same chunks
+    try:
+        with open(archive_path, "xb") as copy:
+            async for chunk in received():
+                if stream is not None and not stream.closed:
+                    await asyncio.to_thread(store_chunk, copy, stream, chunk)
+                else:
+                    await asyncio.to_thread(copy.write, chunk)
+    finally:
+        if stream is not None:
+            await asyncio.to_thread(stream.feed, None)
+
+    if stream is None:
+        start_ingest(archive, iter_archive_videos(archive_path, UPLOAD_DIR, archive.id[:8]), priority, camera)
+    return {"archive_id": archive.id, "status_url": f"/archives/{archive.id}"}
+
+@app.get("/archives/{archive_id}")
+def get_archive(archive_id: str):
+    archive = ARCHIVES.get(archive_id)
+    if archive is None:
+        return JSONResponse(content={"error": "Archive not found"}, status_code=404)
+    return archive.summary()
+
+# ------------------------------ PLATE WATCHLIST ------------------------------
+
+# Loaded on first use and replaced whenever a new watchlist is uploaded
+watchlist_cache = {"watchlist": None}
+
+def current_watchlist():
+    if watchlist_cache["watchlist"] is None:
+        watchlist_cache["watchlist"] = load_watchlist(WATCHLIST_FILE)
+    return watchlist_cache["watchlist"]
+
+@app.post("/watchlist/")
+async def upload_watchlist(file: UploadFile = File(...)):
+    """
+    Replace the watchlist with an uploaded file: one plate per line, or CSV with the
+    plate in the first column. Analyses started afterwards raise alerts for matches.
+    """
+    temp_path = WATCHLIST_FILE + ".upload"
+    with open(temp_path, "wb") as buffer:
+        shutil.copyfileobj(file.file, buffer)
+
+    try:
+        watchlist = Watchlist.load(temp_path)
+    except (UnicodeDecodeError, ValueError) as e:
+        os.remove(temp_path)
+        return JSONResponse(content={"error": f"Could not read watchlist: {str(e)}"}, status_code=400)
+
+    os.replace(temp_path, WATCHLIST_FILE)
+    watchlist_cache["watchlist"] = watchlist
+    return {"status": "success", "entries": len(watchlist)}
+
+@app.get("/watchlist/")
+def get_watchlist():
+    watchlist = current_watchlist()
+    return {"entries": len(watchlist) if watchlist is not None else 0}
+
+@app.get("/watchlist/match")
+def match_watchlist(plate: str):
+    """
+    Check a plate against the watchlist, tolerating common OCR confusions.
+    """
+    watchlist = current_watchlist()
+    if watchlist is None:
+        return JSONResponse(content={"error": "No watchlist uploaded"}, status_code=404)
+    return {"plate": plate, "matches": watchlist.match(plate)}
+
+# ------------------------------ CAMERA REGIONS OF INTEREST ------------------------------
+
+@app.get("/cameras/")
+def list_cameras():
+    cameras = [os.path.splitext(f)[0] for f in os.listdir(CAMERA_PROFILE_DIR) if f.endswith(".json")]
+    return {"cameras": cameras}
+
+@app.get("/cameras/{camera}/roi")
+def get_camera_roi(camera: str):
+    roi = load_roi(camera)
+    if roi is None:
+        return JSONResponse(content={"error": "No region of interest stored for this camera"}, status_code=404)
+    return {"camera": camera, "roi": roi}
+
+@app.put("/cameras/{camera}/roi")
+def set_camera_roi(camera: str, roi: dict = Body(...)):
+    """
+    Store a camera's region of interest: {"rects": [[x, y, w, h], ...], "polygons": [[[x, y], ...], ...]}
+    with coordinates given as fractions of the frame width/height.
+    """
+    try:
+        roi = save_roi(camera, roi)
+    except (ValueError, TypeError) as e:
+        return JSONResponse(content={"error": str(e)}, status_code=400)
+    return {"camera": camera, "roi": roi}
+
+# ------------------------------ VIDEO STREAMING & EVIDENCE CLIPS ------------------------------
+
+@app.get("/videos/")
+def list_videos():
+    videos = [f for f in os.listdir(UPLOAD_DIR) if os.path.isfile(os.path.join(UPLOAD_DIR, f))]
+    return {"videos": videos}
+
+@app.get("/videos/{video_name}")
+def get_video(video_name: str):
+    """
+    Stream an uploaded video; FileResponse honours Range requests so browsers can seek.
+    """
+    video_path = os.path.join(UPLOAD_DIR, os.path.basename(video_name))
+    if not os.path.isfile(video_path):
+        return JSONResponse(content={"error": "Video not found"}, status_code=404)
+    return FileResponse(video_path)
+
+@app.get("/videos/{video_name}/clip")
+def get_video_clip(video_name: str, t: float = Query(..., ge=0),
+                   before: float = Query(5.0, ge=0, le=300), after: float = Query(5.0, ge=0, le=300)):
+    """
+    Return a clip of an uploaded video from `before` seconds ahead of timestamp `t`
+    to `after` seconds past it. Clips are cut without re-encoding and cached.
+    """
+    video_path = os.path.join(UPLOAD_DIR, os.path.basename(video_name))
+    if not os.path.isfile(video_path):
+        return JSONResponse(content={"error": "Video not found"}, status_code=404)
+
+    try:
+        clip_path = cut_clip(video_path, t, CLIPS_DIR, before=before, after=after)
+    except RuntimeError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=500)
+    return FileResponse(clip_path)
+
 # ------------------------------ CSV UPLOAD & PROCESSING ------------------------------
 
 @app.post("/upload_csv/")
@@ -78,6 +423,7 @@ async def upload_csv(file: UploadFile = File(...)):
         shutil.copyfileobj(file.file, buffer)
     
     try:
+        pd = engines.load("pandas")
         df = pd.read_csv(file_path)
 
         # Ensure required columns exist
@@ -111,6 +457,192 @@ def get_csv_file(filename: str):
         return FileResponse(file_path, media_type="text/csv", filename=filename)
     return JSONResponse(content={"error": "CSV file not found"}, status_code=404)
 
+# ------------------------------ FACE GALLERY SEARCH ------------------------------
+
+@app.post("/faces/search/")
+def search_faces(files: List[UploadFile] = File(...), k: int = Query(10, ge=1, le=1000)):
+    """
+    Find the k nearest gallery faces for every face found in the probe image(s).
+    A plain def on purpose: FastAPI runs it in its thread pool, so face detection and the
+    gallery scan do not block the event loop (and live job streams) while they run.
+    """
+    # Loaded on first search so the server does not pay the dlib start-up cost otherwise
+    try:
+        face_recognition = engines.load("face_recognition")
+    except ImportError as e:
+        return JSONResponse(content={"error": f"Face recognition is not available: {str(e)}"}, status_code=503)
+
+    probes = []
+    results = []
+    for file in files:
+        try:
+            image = face_recognition.load_image_file(file.file)
+        except Exception as e:
+            return JSONResponse(content={"error": f"Could not read image {file.filename}: {str(e)}"}, status_code=400)
+        locations = face_recognition.face_locations(image)
+        encodings = face_recognition.face_encodings(image, locations)
+        for location, encoding in zip(locations, encodings):
+            probes.append(encoding)
+            results.append({"probe": file.filename, "location": list(location), "matches": []})
+
+    if not probes:
+        return JSONResponse(content={"error": "No faces found in the probe image(s)"}, status_code=400)
+
+    # All probes are searched in a single pass over the gallery
+    for result, neighbours in zip(results, face_gallery.search(probes, k=k)):
+        for index, distance in neighbours:
+            match = face_gallery.metadata(index)
+            match.update({"index": index, "distance": distance})
+            result["matches"].append(match)
+
+    return {"gallery_size": len(face_gallery), "results": results}
+
+# ------------------------------ RAW IOT / BLUETOOTH CAPTURES ------------------------------
+
+@app.post("/upload_capture/")
+async def upload_capture(file: UploadFile = File(...), to_csv: bool = Query(False)):
+    """
+    Uploads a raw btsnoop or pcap capture and builds its time index.
+    With to_csv, the events are also exported as a When/Where/Why/What CSV to csv_uploads.
+    """
+    capture_name = os.path.basename(file.filename)
+    capture_path = os.path.join(CAPTURE_DIR, capture_name)
+    await asyncio.to_thread(save_upload, file.file, capture_path, "wb")  # A re-upload replaces the capture
+
+    try:
+        # Parsing a multi-GB capture takes a while, so keep it off the event loop
+        index = await asyncio.to_thread(CaptureIndex, capture_path)
+        csv_path = None
+        if to_csv:
+            csv_path = os.path.join(CSV_UPLOAD_DIR, os.path.splitext(capture_name)[0] + ".csv")
+            await asyncio.to_thread(export_csv, iter_events(capture_path), csv_path)
+    except ValueError as e:
+        os.remove(capture_path)
+        return JSONResponse(content={"error": str(e)}, status_code=400)
+
+    return {
+        "status": "success",
+        "capture": capture_name,
+        "events": len(index),
+        "time_range": index.time_range(),
+        "csv_path": os.path.abspath(csv_path) if csv_path else None,
+    }
+
+@app.get("/captures/")
+def list_captures():
+    captures = [f for f in os.listdir(CAPTURE_DIR) if not f.endswith(".npy")]
+    return {"captures": captures}
+
+@app.get("/captures/{capture_name}/events")
+def get_capture_events(capture_name: str, start: float = Query(None), end: float = Query(None),
+                       limit: int = Query(1000, ge=1, le=100000)):
+    """
+    Return the events of a capture between start and end (unix seconds) using its time index.
+    """
+    capture_path = os.path.join(CAPTURE_DIR, os.path.basename(capture_name))
+    if not os.path.isfile(capture_path):
+        return JSONResponse(content={"error": "Capture not found"}, status_code=404)
+
+    index = CaptureIndex(capture_path)
+    return {"capture": capture_name, "time_range": index.time_range(),
+            "events": index.query(start, end, limit=limit)}
+
+# ------------------------------ EVIDENCE TIMELINE CORRELATION ------------------------------
+
+@app.get("/timeline/")
+def get_timeline(plate: str = Query(None), faces: bool = Query(False),
+                 csv: List[str] = Query([]), capture: List[str] = Query([]),
+                 window: float = Query(30.0, gt=0), lat: float = Query(None), lon: float = Query(None),
+                 radius_m: float = Query(None, gt=0), max_events: int = Query(100, ge=1, le=10000)):
+    """
+    Correlate video detections with IoT events by time, e.g. which devices were near
+    while a plate was on camera.
+
+    Detections are plate sightings recorded by dash3.py (optionally only those matching
+    `plate`) and, with faces=true, faces from the gallery. Events come from uploaded
+    CSVs (`csv`) and raw captures (`capture`) within `window` seconds of a detection.
+    With lat/lon/radius_m, CSV rows are also limited to that distance from the camera.
+    Faces are only listed when at least one event falls within their window.
+
+    Detections from videos analysed without a start_time have "start_estimated": true;
+    their times come from the file's modification time and may be far off for uploads.
+    """
+    # /upload/ runs record detections in the top folder, analysis jobs in their own folder
+    detection_logs = [os.path.join(IMAGE_FOLDER, "detections.jsonl")]
+    detection_logs += sorted(glob.glob(os.path.join(IMAGE_FOLDER, "*", "detections.jsonl")))
+    detections = [d for path in detection_logs for d in load_plate_detections(path, plate)]
+    # Face times come from the gallery's memory-mapped records; metadata is decoded later,
+    # only for faces that have events nearby
+    face_indexes, face_times_s = face_times(face_gallery) if faces else (np.empty(0, dtype=np.int64), np.empty(0))
+    if not detections and len(face_indexes) == 0:
+        return {"matches": [], "devices": [], "detections": 0, "events": 0, "estimated_start_detections": 0}
+
+    detection_times = np.concatenate([[d["time"] for d in detections], face_times_s])
+    sources = []
+    captures = []
+    try:
+        for csv_name in csv:
+            csv_path = os.path.join(CSV_UPLOAD_DIR, os.path.basename(csv_name))
+            if not os.path.isfile(csv_path):
+                return JSONResponse(content={"error": f"CSV file {csv_name} not found"}, status_code=404)
+            df = load_csv_events(csv_path)
+            if lat is not None and lon is not None and radius_m is not None:
+                df = within_radius(df, lat, lon, radius_m)
+            sources.append(csv_event_source(df))
+
+        for capture_name in capture:
+            capture_path = os.path.join(CAPTURE_DIR, os.path.basename(capture_name))
+            if not os.path.isfile(capture_path):
+                return JSONResponse(content={"error": f"Capture {capture_name} not found"}, status_code=404)
+            # Times and devices come from the memory-mapped index around the detections;
+            # records are only read back from the capture for the events reported
+            index = CaptureIndex(capture_path)
+            captures.append(index)
+            intervals = [(start, math.nextafter(end, math.inf))  # Index spans exclude their end
+                         for start, end in merge_windows(detection_times, window)]
+            sources.append(capture_event_source(index, intervals))
+    except ValueError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=400)
+
+    event_times, event_devices, get_event = combine_sources(sources)
+    if len(face_indexes) > 0:
+        _, lo, hi = window_join(face_times_s, event_times, window)
+        detections += load_face_detections(face_gallery, face_indexes[hi > lo])
+    try:
+        timeline = correlate(detections, event_times, event_devices, get_event, window=window, max_events=max_events)
+    finally:
+        for index in captures:
+            index.close()
+    timeline.update({"detections": len(detections), "events": len(event_times),
+                     "estimated_start_detections": sum(1 for d in detections if d["start_estimated"])})
+    return timeline
+
+# ------------------------------ READINESS & WARM-UP ------------------------------
+
+@app.get("/ready")
+def readiness():
+    """
+    Report startup timings and which analysis engines are already loaded.
+    """
+    return {
+        "ready": server_state["started_at"] is not None,
+        "uptime_s": round(time.time() - server_state["started_at"], 1) if server_state["started_at"] else None,
+        "import_s": round(IMPORT_SECONDS, 3),
+        "startup_s": server_state["startup_s"],
+        "warming_up": server_state["warming_up"],
+        "engines": engines.status(),
+    }
+
+@app.post("/warmup")
+async def warmup(names: List[str] = Query(list(engines.ENGINES), alias="engine")):
+    """
+    Load analysis engines now so the first real request does not pay for the import.
+    """
+    unknown = [name for name in names if name not in engines.ENGINES]
+    if unknown:
+        return JSONResponse(content={"error": f"Unknown engines: {', '.join(unknown)}"}, status_code=400)
+    return {"engines": await asyncio.to_thread(engines.warm_up, names)}
+
 # ------------------------------ RUN FASTAPI SERVER ------------------------------
 
 if __name__ == "__main__":
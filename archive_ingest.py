@@ -0,0 +1,158 @@
+import io
+import os
+import queue
+import shutil
+import tarfile
+import time
+import uuid
+import zipfile
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".m4v", ".mpg", ".mpeg", ".ts", ".h264", ".dav")
+
+# In-memory registry of ingested archives, keyed by archive id
+ARCHIVES = {}
+
+class Archive:
+    """An uploaded DVR export and the analysis jobs created from its videos."""
+
+    def __init__(self, name):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.status = "unpacking"
+        self.error = None
+        self.jobs = []
+
+    def summary(self):
+        """Aggregate the status of every job created from the archive."""
+        counts = {}
+        for job in self.jobs:
+            counts[job.status] = counts.get(job.status, 0) + 1
+        finished = sum(1 for job in self.jobs if job.finished)
+        done = self.status != "unpacking" and finished == len(self.jobs)
+        return {
+            "archive_id": self.id,
+            "name": self.name,
+            "status": ("complete" if done else "processing") if self.status == "unpacked" else self.status,
+            "error": self.error,
+            "videos": len(self.jobs),
+            "finished": finished,
+            "job_status_counts": counts,
+            "detections": sum(job.detections for job in self.jobs),
+            "alerts": sum(job.alerts for job in self.jobs),
+            "jobs": [job.summary() for job in self.jobs],
+        }
+
+def _is_video(name):
+    return name.lower().endswith(VIDEO_EXTENSIONS)
+
+def _safe_name(name):
+    """Flatten an archive member path into a single safe file name (ch01/00001.dav -> ch01_00001.dav)."""
+    parts = [part for part in name.replace("\\", "/").split("/") if part not in ("", ".", "..")]
+    return "_".join("".join(c if c.isalnum() or c in "-._" else "_" for c in part) for part in parts)
+
+def _copy_member(source, dest_dir, prefix, name, position, mtime):
+    # DVR exports reuse file names across channel folders, so the whole member path is
+    # kept; the entry's position disambiguates names that still collide after flattening
+    dest_path = os.path.join(dest_dir, f"{prefix}_{_safe_name(name)}")
+    try:
+        dest = open(dest_path, "xb")
+    except FileExistsError:
+        dest_path = os.path.join(dest_dir, f"{prefix}_{position}_{_safe_name(name)}")
+        dest = open(dest_path, "xb")  # Never overwrite an extracted video
+    with dest:
+        shutil.copyfileobj(source, dest)
+    # Keep the recording's own modification time; it is used to estimate when it started
+    os.utime(dest_path, (mtime, mtime))
+    return dest_path
+
+def iter_archive_videos(archive_path, dest_dir, prefix):
+    """
+    Extract the videos in a zip or tar archive one at a time.
+
+    Each video is written out and yielded before the next entry is read, so callers
+    can start analysing the first camera while the rest are still being unpacked.
+    Tar archives (optionally compressed) are read as a stream in a single pass.
+
+    Args:
+        archive_path (str): Path of the zip/tar archive
+        dest_dir (str): Directory to extract videos into
+        prefix (str): Prefix for extracted file names, keeping archives apart
+
+    Yields:
+        str: Path of each extracted video
+    """
+    if zipfile.is_zipfile(archive_path):
+        with zipfile.ZipFile(archive_path) as archive:
+            for position, info in enumerate(archive.infolist()):
+                if info.is_dir() or not _is_video(info.filename):
+                    continue
+                with archive.open(info) as source:
+                    mtime = time.mktime(info.date_time + (0, 0, -1))
+                    yield _copy_member(source, dest_dir, prefix, info.filename, position, mtime)
+        return
+
+    with open(archive_path, "rb") as f:
+        yield from iter_tar_videos(f, dest_dir, prefix)
+
+def iter_tar_videos(fileobj, dest_dir, prefix):
+    """Extract the videos of a tar archive read sequentially from a file object; see iter_archive_videos."""
+    # "r|*" reads the tar sequentially, detecting gzip/bz2/xz compression
+    with tarfile.open(fileobj=fileobj, mode="r|*") as archive:
+        for position, member in enumerate(archive):
+            if not member.isfile() or not _is_video(member.name):
+                continue
+            source = archive.extractfile(member)
+            yield _copy_member(source, dest_dir, prefix, member.name, position, member.mtime)
+
+def iter_stream_videos(stream, dest_dir, prefix):
+    """Extract the videos of a tar archive that is still arriving through an ArchiveStream."""
+    try:
+        yield from iter_tar_videos(stream, dest_dir, prefix)
+    finally:
+        stream.close()  # Stop the uploader waiting on a reader that has finished or failed
+
+class ArchiveStream(io.RawIOBase):
+    """
+    Read-only file object fed with chunks by another thread.
+
+    The request handler feeds upload chunks while tarfile reads them on a worker
+    thread, so videos are extracted (and queued for analysis) while the rest of the
+    archive is still uploading. A bounded queue keeps the uploader at most
+    `max_chunks` ahead of extraction.
+    """
+
+    def __init__(self, max_chunks=64):
+        super().__init__()
+        self._chunks = queue.Queue(maxsize=max_chunks)
+        self._buffer = memoryview(b"")
+        self._eof = False
+
+    def readable(self):
+        return True
+
+    def feed(self, chunk):
+        """
+        Queue a chunk for the reader; None marks the end of the archive.
+
+        Returns:
+            bool: False once the reader has stopped, so the rest need not be fed
+        """
+        while not self.closed:
+            try:
+                self._chunks.put(chunk, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def readinto(self, b):
+        while not self._buffer and not self._eof:
+            chunk = self._chunks.get()
+            if chunk is None:
+                self._eof = True
+            else:
+                self._buffer = memoryview(chunk)
+        size = min(len(b), len(self._buffer))
+        b[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
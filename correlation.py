@@ -0,0 +1,298 @@
+import json
+import os
+from datetime import datetime, timezone
+import numpy as np
+from watchlist import Watchlist
+import engines
+
+EARTH_RADIUS_M = 6371000.0
+
+# Column names recognised as coordinates in uploaded IoT CSVs (compared case-insensitively)
+LATITUDE_COLUMNS = ("lat", "latitude")
+LONGITUDE_COLUMNS = ("lon", "lng", "long", "longitude")
+
+def estimate_video_start(video_path, duration):
+    """
+    Best guess of when a recording started, in unix seconds.
+
+    Dashcams and DVRs close a file when recording stops, so its modification time
+    minus the video duration approximates the start time. Uploaded or copied files
+    carry the time they were written instead, so results are only a guess and are
+    flagged with "start_estimated"; pass the real start time wherever it is known.
+    """
+    return os.path.getmtime(video_path) - duration
+
+def parse_time(value):
+    """Accept unix seconds or an ISO 8601 string (naive times are taken as UTC)."""
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    parsed = datetime.fromisoformat(str(value))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+def load_plate_detections(detections_path, plate=None):
+    """
+    Read plate detections recorded by dash3.py.
+
+    Args:
+        detections_path (str): detections.jsonl written by the analyser
+        plate (str): Only keep detections whose text matches this plate,
+                     tolerating OCR confusions
+
+    Returns:
+        list: Detection dicts with an absolute "time" in unix seconds; malformed or
+              partially written lines are skipped
+    """
+    if not os.path.exists(detections_path):
+        return []
+
+    matcher = None
+    if plate:
+        matcher = Watchlist()
+        matcher.add(plate)
+
+    detections = []
+    with open(detections_path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                detection = json.loads(line)
+            except ValueError:
+                continue  # E.g. the last line of a run that was killed mid-write
+            if not isinstance(detection, dict) or not isinstance(detection.get("time"), (int, float)):
+                continue
+            if matcher is not None and not matcher.match(detection.get("text", "")):
+                continue
+            detection["kind"] = "plate"
+            detection.setdefault("start_estimated", True)  # Recorded before the flag existed
+            detections.append(detection)
+    return detections
+
+def face_times(gallery):
+    """
+    Return the gallery indexes and absolute times of faces with a known video start.
+    Times come from the gallery's memory-mapped records, so no metadata is decoded.
+    """
+    times = np.asarray(gallery.times(), dtype=np.float64)
+    indexes = np.flatnonzero(~np.isnan(times))
+    return indexes, times[indexes]
+
+def load_face_detections(gallery, indexes=None):
+    """Turn faces in a FaceGallery (all, or the given indexes) that have a known video start into detections."""
+    detections = []
+    for index, face in gallery.entries(indexes):
+        if face.get("video_start") is None:
+            continue
+        face.update({"kind": "face", "index": index, "time": face["video_start"] + face["timestamp"]})
+        face.setdefault("start_estimated", True)  # The face extractors estimate it from the file
+        detections.append(face)
+    return detections
+
+def load_csv_events(csv_path):
+    """
+    Load IoT rows from an uploaded When/Where/Why/What CSV.
+
+    Returns:
+        DataFrame: Rows with a parseable When, plus "time" (unix seconds) and, when
+                   the CSV has coordinate columns, "lat"/"lon"
+    """
+    pd = engines.load("pandas")  # Only needed for CSV evidence
+
+    df = pd.read_csv(csv_path)
+    if "When" not in df.columns:
+        raise ValueError(f"{os.path.basename(csv_path)} has no When column")
+
+    when = pd.to_datetime(df["When"], utc=True, errors="coerce")
+    df = df[when.notna()].copy()
+    # Subtracting the epoch is independent of the datetime resolution pandas picked
+    df["time"] = (when[when.notna()] - pd.Timestamp(0, tz="UTC")).dt.total_seconds().to_numpy()
+
+    columns = {c.lower(): c for c in df.columns}
+    for names, target in ((LATITUDE_COLUMNS, "lat"), (LONGITUDE_COLUMNS, "lon")):
+        found = next((columns[name] for name in names if name in columns), None)
+        if found is not None and found != target:
+            df[target] = pd.to_numeric(df[found], errors="coerce")
+    df["source"] = os.path.basename(csv_path)
+    return df
+
+def csv_event_source(df):
+    """
+    Wrap a DataFrame from load_csv_events as (event_times, event_devices, get_event) for correlate.
+    Rows are only converted to JSON-safe dicts when they are reported.
+    """
+    def get_event(position):
+        return json.loads(df.iloc[[position]].to_json(orient="records"))[0]
+    device_column = next((c for c in ("device", "Where") if c in df.columns), None)
+    if device_column is None:
+        devices = np.full(len(df), None, dtype=object)
+    else:
+        devices = df[device_column].to_numpy(dtype=object)
+    return df["time"].to_numpy(dtype=np.float64), devices, get_event
+
+def list_event_source(events):
+    """Wrap a list of event dicts with a "time" key as (event_times, event_devices, get_event)."""
+    times = np.array([event["time"] for event in events], dtype=np.float64)
+    devices = np.array([event.get("device") for event in events], dtype=object)
+    return times, devices, events.__getitem__
+
+def capture_event_source(index, intervals):
+    """
+    Wrap the events of a CaptureIndex inside (start, end) intervals as a source.
+
+    Times and devices come straight from the memory-mapped index; a record is only
+    read back from the capture and parsed when get_event asks for it.
+
+    Args:
+        index (CaptureIndex): Time index of the capture
+        intervals (list): Disjoint (start, end) windows in time order, end exclusive
+    """
+    spans = [index.span(start, end) for start, end in intervals]
+    positions = np.concatenate([np.arange(lo, hi) for lo, hi in spans] + [np.empty(0, dtype=np.int64)])
+    entries = index.index[positions]
+    devices = np.char.decode(entries["device"], "ascii").astype(object)
+
+    def get_event(position):
+        event = index.read(int(positions[position]))
+        event["time"] = event["timestamp"]
+        return event
+    return entries["timestamp"].astype(np.float64), devices, get_event
+
+def combine_sources(sources):
+    """Merge several (event_times, event_devices, get_event) sources into one."""
+    if not sources:
+        return np.empty(0, dtype=np.float64), np.empty(0, dtype=object), None
+    starts = np.cumsum([0] + [len(times) for times, _, _ in sources])
+
+    def get_event(position):
+        source = int(np.searchsorted(starts, position, side="right")) - 1
+        return sources[source][2](position - int(starts[source]))
+    return (np.concatenate([times for times, _, _ in sources]),
+            np.concatenate([devices for _, devices, _ in sources]), get_event)
+
+def merge_windows(times, window):
+    """
+    Merge the +/- window spans around each time into disjoint (start, end) intervals,
+    so a time-indexed source is read once per cluster of detections instead of over
+    the whole min..max span.
+    """
+    times = np.sort(np.asarray(times, dtype=np.float64))
+    if len(times) == 0:
+        return []
+    # A new interval starts wherever two neighbouring spans do not touch
+    breaks = np.flatnonzero(np.diff(times) > 2 * window) + 1
+    starts = times[np.concatenate([[0], breaks])] - window
+    ends = times[np.concatenate([breaks - 1, [len(times) - 1]])] + window
+    return list(zip(starts.tolist(), ends.tolist()))
+
+def within_radius(df, lat, lon, radius_m):
+    """Keep rows whose coordinates lie within radius_m of a point; rows without coordinates are dropped."""
+    if "lat" not in df.columns or "lon" not in df.columns:
+        return df.iloc[0:0]
+    distance = haversine_m(df["lat"].to_numpy(dtype=np.float64), df["lon"].to_numpy(dtype=np.float64), lat, lon)
+    return df[distance <= radius_m]
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """Great-circle distance in metres; accepts numpy arrays."""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+def window_join(detection_times, event_times, window):
+    """
+    Find, for every detection, the events within +/- window seconds.
+
+    Events are sorted once and each detection's window is located with two binary
+    searches, so the join costs O((n + m) log n) plus the size of the output rather
+    than comparing every detection with every event.
+
+    Args:
+        detection_times (array): Detection times in unix seconds
+        event_times (array): Event times in unix seconds
+        window (float): Maximum time difference in seconds
+
+    Returns:
+        tuple: (order, lo, hi) where events order[lo[i]:hi[i]] match detection i
+    """
+    event_times = np.asarray(event_times, dtype=np.float64)
+    detection_times = np.asarray(detection_times, dtype=np.float64)
+    order = np.argsort(event_times, kind="stable")
+    sorted_times = event_times[order]
+    lo = np.searchsorted(sorted_times, detection_times - window, side="left")
+    hi = np.searchsorted(sorted_times, detection_times + window, side="right")
+    return order, lo, hi
+
+def correlate(detections, event_times, event_devices, get_event, window=30.0, max_events=100):
+    """
+    Join detections with IoT events that happened within `window` seconds of them.
+
+    For each detection only the `max_events` closest events are materialised: the walk
+    starts where the detection falls among the sorted event times and moves outwards,
+    always taking the nearer neighbour. Device counts are taken from `event_devices`
+    over the events inside any window, each event counted once.
+
+    Args:
+        detections (list): Detection dicts with a "time" key
+        event_times (array): Time of every event in unix seconds
+        event_devices (array): Device of every event (None when unknown)
+        get_event (callable): Returns the event dict at a position; only called for
+                              reported events
+        window (float): Maximum time difference in seconds
+        max_events (int): Cap on events reported per detection (closest first)
+
+    Returns:
+        dict: "matches" (each detection with its nearby events and time offsets) and
+              "devices" (every device seen near any detection, with counts)
+    """
+    if not detections:
+        return {"matches": [], "devices": []}
+
+    event_times = np.asarray(event_times, dtype=np.float64)
+    order, lo, hi = window_join([d["time"] for d in detections], event_times, window)
+    sorted_times = event_times[order]
+
+    cache = {}
+    def event_at(rank):
+        position = int(order[rank])
+        if position not in cache:
+            cache[position] = get_event(position)
+        return cache[position]
+
+    matches = []
+    for detection, start, end in zip(detections, lo.tolist(), hi.tolist()):
+        t = detection["time"]
+        left = right = min(max(int(np.searchsorted(sorted_times, t)), start), end)
+        nearby = []
+        while len(nearby) < max_events and (left > start or right < end):
+            if right >= end or (left > start and t - sorted_times[left - 1] <= sorted_times[right] - t):
+                left -= 1
+                rank = left
+            else:
+                rank = right
+                right += 1
+            event = event_at(rank)
+            nearby.append(dict(event, delta_s=round(event["time"] - t, 3)))
+        matches.append({"detection": detection, "event_count": end - start, "events": nearby})
+
+    # Every event inside at least one window, counted once however many windows overlap it
+    edges = np.zeros(len(sorted_times) + 1, dtype=np.int64)
+    np.add.at(edges, lo, 1)
+    np.add.at(edges, hi, -1)
+    covered = order[np.cumsum(edges)[:-1] > 0]
+
+    devices = {}
+    for device, time_s in zip(np.asarray(event_devices, dtype=object)[covered], event_times[covered].tolist()):
+        if not isinstance(device, str) or not device:
+            continue
+        seen = devices.setdefault(device, {"device": device, "count": 0, "first_seen": time_s, "last_seen": time_s})
+        seen["count"] += 1
+        seen["first_seen"] = min(seen["first_seen"], time_s)
+        seen["last_seen"] = max(seen["last_seen"], time_s)
+
+    matches.sort(key=lambda m: m["detection"]["time"])
+    return {"matches": matches, "devices": sorted(devices.values(), key=lambda d: -d["count"])}
@@ -1,8 +1,19 @@
 import cv2
 import numpy as np
 import os
+import json
 import time
+import argparse
 from datetime import datetime
+from frame_reader import FrameReader
+from job_events import EVENT_PREFIX
+from roi import RegionOfInterest, load_roi
+from watchlist import load_watchlist
+from correlation import estimate_video_start, parse_time
+
+# The edge-detection fallback keeps plates of at least 1000 px² (aspect up to 5) at half
+# scale, i.e. about 80x30 px in the full frame; smaller regions cannot contain one
+ROI_MIN_SIZE = (80, 30)
 
 # Optional: Import pytesseract if available
 try:
@@ -13,9 +24,8 @@ except ImportError:
     TESSERACT_AVAILABLE = False
     print("Warning: pytesseract not found. License plate text recognition will be disabled.")
 
-def create_output_folders():
-    """Create folders to store the output in a fixed folder."""
-    base_dir = "dashcam_analysis"  # Fixed folder name
+def create_output_folders(base_dir="dashcam_analysis"):
+    """Create folders to store the output, by default in a fixed folder."""
     plates_dir = os.path.join(base_dir, "license_plates")
     
     os.makedirs(base_dir, exist_ok=True)
@@ -23,13 +33,20 @@ def create_output_folders():
     
     return base_dir, plates_dir
 
-def analyze_dashcam_video(video_path, sample_rate=5):
+def analyze_dashcam_video(video_path, sample_rate=5, queue_size=32, on_event=None, roi=None, watchlist=None,
+                          video_start=None, output_dir="dashcam_analysis"):
     """
     Analyze dashcam footage to detect license plates.
     
     Args:
         video_path: Path to the video file
         sample_rate: Process every nth frame to improve performance
+        queue_size: Number of frames decoded ahead of detection on a background thread
+        on_event: Optional callback receiving progress and detection events as dicts
+        roi: Optional RegionOfInterest; only pixels inside it are scanned for plates
+        watchlist: Optional Watchlist; recognised plates matching it raise alerts
+        video_start: When the recording started in unix seconds; estimated from the file if omitted
+        output_dir: Folder for the log, frames and plate crops; give concurrent runs their own folder
     """
     # Try to load a license plate cascade classifier
     try:
@@ -41,8 +58,8 @@ def analyze_dashcam_video(video_path, sample_rate=5):
         plate_cascade = None
         print("Using edge detection for potential license plates")
     
-    # Create output folders (fixed folder)
-    base_dir, plates_dir = create_output_folders()
+    # Create output folders
+    base_dir, plates_dir = create_output_folders(output_dir)
     
     # Open video file
     video = cv2.VideoCapture(video_path)
@@ -60,34 +77,70 @@ def analyze_dashcam_video(video_path, sample_rate=5):
     # Create output log file
     log_file = os.path.join(base_dir, "analysis_log.txt")
     
+    # Detections are appended across runs so they can be correlated with IoT evidence
+    detections_file = os.path.join(base_dir, "detections.jsonl")
+    # For uploads the file time is the upload time, so estimated detection times are flagged
+    start_estimated = video_start is None
+    if start_estimated:
+        video_start = estimate_video_start(video_path, duration)
+    
     plate_count = 0
-    frame_number = 0
     
-    with open(log_file, 'w') as log:
+    # Decode the next frames on a background thread while detection runs on this one
+    reader = FrameReader(video, sample_rate=sample_rate, queue_size=queue_size, start_index=1)
+    
+    # Unbuffered append: each detection line reaches the file in a single write, so lines
+    # from runs sharing the file never interleave
+    with open(log_file, 'w') as log, open(detections_file, 'ab', buffering=0) as detections_log, reader:
         log.write(f"Dashcam Analysis Log - {datetime.now()}\n")
         log.write(f"Video: {video_path}\n")
         log.write("=" * 50 + "\n\n")
         
+        def record_event(event):
+            """Persist detections with their absolute time, then pass the event on."""
+            if event["type"] == "detection":
+                detections_log.write((json.dumps(dict(
+                    event,
+                    video=os.path.abspath(video_path),
+                    fps=fps,
+                    video_start=video_start,
+                    start_estimated=start_estimated,
+                    time=video_start + event["frame"] / fps,
+                )) + "\n").encode("utf-8"))
+            if on_event is not None:
+                on_event(event)
+        
         start_time = time.time()
-        while video.isOpened():
-            ret, frame = video.read()
-            if not ret:
-                break
-            
-            frame_number += 1
-            if frame_number % sample_rate != 0:
-                continue
-            
+        last_progress = 0.0
+        for frame_number, frame in reader:
             timestamp = frame_number / fps
             elapsed = time.time() - start_time
             if frame_number % 10 == 0:
                 print(f"\rProcessing frame {frame_number}/{frame_count} - {timestamp:.2f}s - Elapsed: {elapsed:.2f}s", end="")
             
+            # Report progress at most twice a second so viewers are not flooded
+            if on_event is not None and elapsed - last_progress >= 0.5:
+                last_progress = elapsed
+                video_fps = frame_number / elapsed if elapsed > 0 else 0.0
+                on_event({
+                    "type": "progress",
+                    "frame": frame_number,
+                    "total_frames": frame_count,
+                    "fps": round(video_fps, 2),
+                    "eta_s": round((frame_count - frame_number) / video_fps, 1) if video_fps > 0 else None,
+                })
+            
             # Create a copy for visualization
             display_frame = frame.copy()
             
+            # Restrict detection to the camera's region of interest
+            if roi is not None:
+                roi_frame, (x_offset, y_offset) = roi.apply(frame)
+            else:
+                roi_frame, (x_offset, y_offset) = frame, (0, 0)
+            
             # Resize frame for faster processing (keep display frame original size)
-            frame_small = cv2.resize(frame, (0, 0), fx=0.5, fy=0.5)
+            frame_small = cv2.resize(roi_frame, (0, 0), fx=0.5, fy=0.5)
             height, width, _ = frame_small.shape
             
             # Convert to grayscale for detection
@@ -100,12 +153,13 @@ def analyze_dashcam_video(video_path, sample_rate=5):
                 
                 for (x, y, w, h) in plates:
                     # Adjust coordinates for the original frame
-                    x_orig, y_orig, w_orig, h_orig = x*2, y*2, w*2, h*2
+                    x_orig, y_orig, w_orig, h_orig = x*2 + x_offset, y*2 + y_offset, w*2, h*2
                     
                     # Extract license plate image from original frame
                     plate_img = frame[y_orig:y_orig+h_orig, x_orig:x_orig+w_orig]
                     if process_license_plate(plate_img, display_frame, x_orig, y_orig, w_orig, h_orig, 
-                                               frame_number, timestamp, plates_dir, plate_count, log):
+                                               frame_number, timestamp, plates_dir, plate_count, log,
+                                               on_event=record_event, watchlist=watchlist):
                         plate_count += 1
             else:
                 # Fallback method using edge detection to find potential license plates
@@ -120,11 +174,11 @@ def analyze_dashcam_video(video_path, sample_rate=5):
                     x, y, w, h = cv2.boundingRect(contour)
                     aspect_ratio = float(w) / h
                     if 1.5 <= aspect_ratio <= 5.0:
-                        x_orig, y_orig, w_orig, h_orig = x*2, y*2, w*2, h*2
+                        x_orig, y_orig, w_orig, h_orig = x*2 + x_offset, y*2 + y_offset, w*2, h*2
                         plate_img = frame[y_orig:y_orig+h_orig, x_orig:x_orig+w_orig]
                         if process_license_plate(plate_img, display_frame, x_orig, y_orig, w_orig, h_orig, 
                                                    frame_number, timestamp, plates_dir, plate_count, log, 
-                                                   is_potential=True):
+                                                   is_potential=True, on_event=record_event, watchlist=watchlist):
                             plate_count += 1
             
             # Save the annotated frame every 10th processed frame
@@ -137,12 +191,13 @@ def analyze_dashcam_video(video_path, sample_rate=5):
     
     video.release()
     print(f"\nAnalysis completed: {plate_count} license plates detected")
+    print(f"Decode-ahead stats: {reader.stats()}")
     print(f"Results saved to {base_dir}")
     
     return base_dir
 
 def process_license_plate(plate_img, display_frame, x, y, w, h, frame_number, timestamp, 
-                          plates_dir, plate_count, log, is_potential=False):
+                          plates_dir, plate_count, log, is_potential=False, on_event=None, watchlist=None):
     """Process and save a detected license plate."""
     if plate_img.size == 0:
         return False
@@ -199,16 +254,72 @@ def process_license_plate(plate_img, display_frame, x, y, w, h, frame_number, ti
         log.write(f"  Text: {plate_text}\n")
     log.write(f"  Saved to: {plate_file}\n")
     
+    # Check the recognised text against the watchlist of wanted vehicles
+    if watchlist is not None and plate_text != "Unknown" and not plate_text.startswith("Error:"):
+        for match in watchlist.match(plate_text):
+            kind = "exact" if match["exact"] else f"distance {match['distance']}, {match['edit_distance']} character(s) differ"
+            log.write(f"  WATCHLIST ALERT: matches {match['plate']} ({kind}) {match['info']}\n")
+            print(f"\nWATCHLIST ALERT: '{plate_text}' at frame {frame_number} matches {match['plate']} ({kind})")
+            if on_event is not None:
+                on_event({
+                    "type": "alert",
+                    "frame": frame_number,
+                    "timestamp": round(timestamp, 2),
+                    "text": plate_text,
+                    "match": match,
+                    "crop": plate_file,
+                })
+    
+    if on_event is not None:
+        on_event({
+            "type": "detection",
+            "frame": frame_number,
+            "timestamp": round(timestamp, 2),
+            "text": plate_text,
+            "potential": is_potential,
+            "crop": plate_file,
+        })
+    
     return True 
 
+def print_event(event):
+    """Write an event as a single stdout line for the server to pick up."""
+    print(f"\n{EVENT_PREFIX}{json.dumps(event)}", flush=True)
+
 if __name__ == "__main__":
-    video_path = "carplates.mp4"  # Change this to your video file path
-    sample_rate = 2  # Change this value if needed
+    parser = argparse.ArgumentParser(description="Detect license plates in dashcam footage")
+    parser.add_argument("video_path", nargs="?", default="carplates.mp4", help="Path to the video file")
+    parser.add_argument("--sample-rate", type=int, default=2, help="Process every nth frame")
+    parser.add_argument("--queue-size", type=int, default=32, help="Frames decoded ahead of detection")
+    parser.add_argument("--events", action="store_true", help="Emit progress and detection events on stdout")
+    parser.add_argument("--camera", help="Camera profile whose region of interest limits detection")
+    parser.add_argument("--watchlist", help="File of wanted plates to raise alerts for")
+    parser.add_argument("--output-dir", default="dashcam_analysis", help="Folder to save the log, frames and plate crops in")
+    parser.add_argument("--start-time", help="Recording start as unix seconds or ISO 8601 (default: estimated from the file)")
+    args = parser.parse_args()
+    
+    video_path = args.video_path
+    sample_rate = args.sample_rate
+    
+    roi = None
+    if args.camera:
+        roi_definition = load_roi(args.camera)
+        if roi_definition is None:
+            print(f"Warning: no region of interest stored for camera {args.camera}, scanning full frames")
+        else:
+            roi = RegionOfInterest(roi_definition, min_size=ROI_MIN_SIZE)
      
     print(f"Starting analysis of video: {video_path}")
     print(f"Processing every {sample_rate} frame")
     
-    result_dir = analyze_dashcam_video(video_path, sample_rate)
+    watchlist = load_watchlist(args.watchlist)
+    if args.watchlist and watchlist is None:
+        print(f"Warning: watchlist {args.watchlist} not found, plates will not be checked")
+    
+    result_dir = analyze_dashcam_video(video_path, sample_rate, queue_size=args.queue_size,
+                                       on_event=print_event if args.events else None, roi=roi,
+                                       watchlist=watchlist, video_start=parse_time(args.start_time),
+                                       output_dir=args.output_dir)
     
     if result_dir:
         print(f"Analysis complete! Results saved to: {result_dir}")
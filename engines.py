@@ -0,0 +1,51 @@
+import importlib
+import threading
+import time
+
+# Heavy optional dependencies, imported only when first needed
+ENGINES = ("pandas", "cv2", "face_recognition", "pytesseract")
+
+_modules = {}
+_status = {name: {"loaded": False, "import_s": None, "error": None} for name in ENGINES}
+_lock = threading.Lock()
+
+def load(name):
+    """
+    Import an engine on first use and return the module.
+    The import time is recorded and logged so slow dependencies show up in startup logs.
+
+    Raises:
+        ImportError: If the engine is not installed (other import failures propagate as-is)
+    """
+    module = _modules.get(name)
+    if module is not None:
+        return module
+
+    with _lock:
+        if name in _modules:
+            return _modules[name]
+        status = _status.setdefault(name, {"loaded": False, "import_s": None, "error": None})
+        started = time.perf_counter()
+        try:
+            module = importlib.import_module(name)
+        except Exception as e:
+            status["error"] = str(e)
+            print(f"Engine {name} failed to load: {str(e)}")
+            raise
+        status.update({"loaded": True, "import_s": round(time.perf_counter() - started, 3), "error": None})
+        _modules[name] = module
+        print(f"Engine {name} loaded in {status['import_s']:.3f}s")
+        return module
+
+def warm_up(names=ENGINES):
+    """Load the given engines, skipping ones that are not installed; returns their status."""
+    for name in names:
+        try:
+            load(name)
+        except Exception:
+            pass  # Recorded in the engine status
+    return status()
+
+def status():
+    """Return which engines are loaded, how long each import took and any load errors."""
+    return {name: dict(info) for name, info in _status.items()}
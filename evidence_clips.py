@@ -0,0 +1,65 @@
+import os
+import shutil
+import subprocess
+import threading
+
+_clip_locks = {}
+_clip_locks_guard = threading.Lock()
+
+def _lock_for(path):
+    with _clip_locks_guard:
+        return _clip_locks.setdefault(path, threading.Lock())
+
+def cut_clip(video_path, timestamp, clips_dir, before=5.0, after=5.0):
+    """
+    Cut a clip around a detection timestamp, reusing a cached copy when available.
+
+    The clip is cut with ffmpeg stream copy, so no frames are re-encoded; the start
+    snaps to the keyframe before the requested time, which can make the clip
+    begin slightly early.
+
+    Args:
+        video_path (str): Source video
+        timestamp (float): Detection time in seconds
+        clips_dir (str): Directory holding generated clips
+        before (float): Seconds to include before the timestamp
+        after (float): Seconds to include after the timestamp
+
+    Returns:
+        str: Path of the clip file
+
+    Raises:
+        RuntimeError: If ffmpeg is not available or fails
+    """
+    start = max(timestamp - before, 0.0)
+    duration = timestamp + after - start
+    stem, ext = os.path.splitext(os.path.basename(video_path))
+    clip_path = os.path.join(clips_dir, f"{stem}_{int(start * 1000)}_{int(duration * 1000)}{ext or '.mp4'}")
+
+    with _lock_for(clip_path):
+        if os.path.exists(clip_path) and os.path.getmtime(clip_path) >= os.path.getmtime(video_path):
+            return clip_path
+
+        ffmpeg = shutil.which("ffmpeg")
+        if ffmpeg is None:
+            raise RuntimeError("ffmpeg not found on PATH; it is required to cut clips")
+
+        os.makedirs(clips_dir, exist_ok=True)
+        temp_path = clip_path + ".part" + (ext or ".mp4")
+        command = [
+            ffmpeg, "-hide_banner", "-loglevel", "error", "-y",
+            "-ss", f"{start:.3f}",  # Input seeking jumps straight to the preceding keyframe
+            "-i", video_path,
+            "-t", f"{duration:.3f}",
+            "-c", "copy",
+            "-avoid_negative_ts", "make_zero",
+            temp_path,
+        ]
+        result = subprocess.run(command, capture_output=True, text=True)
+        if result.returncode != 0:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise RuntimeError(f"ffmpeg failed: {result.stderr.strip()}")
+
+        os.replace(temp_path, clip_path)
+    return clip_path
@@ -0,0 +1,171 @@
+import json
+import os
+import threading
+import numpy as np
+
+ENCODING_SIZE = 128  # face_recognition produces 128-d encodings
+DEFAULT_GALLERY_DIR = "face_gallery"
+
+# One fixed-size record per face: the encoding, the byte offset of its metadata line and
+# when the face was seen in unix seconds (NaN when the recording start is unknown)
+RECORD_DTYPE = np.dtype([("encoding", "<f4", (ENCODING_SIZE,)), ("metadata_offset", "<i8"), ("time", "<f8")])
+
+class FaceGallery:
+    """
+    Persistent, append-only store of every unique face seen across all jobs.
+
+    Each face is a fixed-size record (float32 encoding plus the byte offset of its
+    metadata) in a file that is memory-mapped for search, so the gallery never has
+    to be loaded into RAM. Metadata (video, frame, timestamp, crop path) is stored
+    as JSON lines. A face is added with two single appends, metadata first, so
+    processes sharing the gallery cannot interleave half-written entries, and a crash
+    between them only leaves an unreferenced metadata line behind.
+    """
+
+    def __init__(self, gallery_dir=DEFAULT_GALLERY_DIR, block_size=65536):
+        """
+        Args:
+            gallery_dir (str): Directory holding the gallery files
+            block_size (int): Number of encodings scanned per block during search
+        """
+        self.gallery_dir = gallery_dir
+        self.block_size = block_size
+        self.records_path = os.path.join(gallery_dir, "faces.rec")
+        self.metadata_path = os.path.join(gallery_dir, "metadata.jsonl")
+        self._lock = threading.Lock()
+        self._matrix = None
+        self._matrix_rows = 0
+
+        os.makedirs(gallery_dir, exist_ok=True)
+        for path in (self.records_path, self.metadata_path):
+            if not os.path.exists(path):
+                open(path, "wb").close()
+
+        # A crash mid-append can leave a partial record; drop it so later records stay aligned
+        size = os.path.getsize(self.records_path)
+        if size % RECORD_DTYPE.itemsize:
+            print(f"Gallery: dropping {size % RECORD_DTYPE.itemsize} bytes of an incomplete face record")
+            os.truncate(self.records_path, size - size % RECORD_DTYPE.itemsize)
+
+    def __len__(self):
+        return os.path.getsize(self.records_path) // RECORD_DTYPE.itemsize
+
+    def add(self, encoding, video, frame, timestamp, crop_path, video_start=None):
+        """
+        Append a face encoding and its metadata to the gallery.
+
+        Args:
+            encoding (array): 128-d face encoding
+            video (str): Source video path
+            frame (int): Frame number the face was found in
+            timestamp (float): Position in the video in seconds
+            crop_path (str): Path of the saved face crop
+            video_start (float): When the recording started, in unix seconds, if known
+
+        Returns:
+            int: Index of the new gallery entry
+        """
+        record = np.zeros(1, dtype=RECORD_DTYPE)
+        record["encoding"] = np.asarray(encoding, dtype=np.float32).reshape(ENCODING_SIZE)
+        record["time"] = np.nan if video_start is None else video_start + float(timestamp)
+        metadata = {
+            "video": video,
+            "frame": int(frame),
+            "timestamp": float(timestamp),
+            "crop_path": crop_path,
+            "video_start": video_start,
+        }
+        line = (json.dumps(metadata) + "\n").encode("utf-8")
+
+        # Unbuffered appends are single writes at the end of the file, even with other
+        # processes appending; the position after our own write tells where it landed
+        with open(self.metadata_path, "ab", buffering=0) as meta:
+            meta.write(line)
+            record["metadata_offset"] = meta.tell() - len(line)
+        # The record is written last: a face only becomes searchable once its metadata exists
+        with open(self.records_path, "ab", buffering=0) as records:
+            records.write(record.tobytes())
+            return records.tell() // RECORD_DTYPE.itemsize - 1
+
+    def metadata(self, index):
+        """Return the metadata dict for a gallery entry."""
+        with open(self.records_path, "rb") as records:
+            records.seek(int(index) * RECORD_DTYPE.itemsize + RECORD_DTYPE.fields["metadata_offset"][1])
+            offset = int(np.frombuffer(records.read(8), dtype="<i8")[0])
+        with open(self.metadata_path, "rb") as meta:
+            meta.seek(offset)
+            return json.loads(meta.readline().decode("utf-8"))
+
+    def entries(self, indexes=None):
+        """Yield (index, metadata) for every face in the gallery, or for the given indexes, in order."""
+        offsets = self._records()["metadata_offset"]
+        if indexes is None:
+            indexes = range(len(offsets))
+        with open(self.metadata_path, "rb") as meta:
+            for index in indexes:
+                meta.seek(int(offsets[index]))
+                yield int(index), json.loads(meta.readline().decode("utf-8"))
+
+    def times(self):
+        """Memory-mapped column of when each face was seen (unix seconds, NaN if unknown)."""
+        return self._records()["time"]
+
+    def _records(self):
+        """Memory-map the face records, remapping only when new rows were appended."""
+        rows = len(self)
+        with self._lock:
+            if self._matrix is None or self._matrix_rows != rows:
+                if rows == 0:
+                    self._matrix = np.empty(0, dtype=RECORD_DTYPE)
+                else:
+                    self._matrix = np.memmap(self.records_path, dtype=RECORD_DTYPE, mode="r", shape=(rows,))
+                self._matrix_rows = rows
+            return self._matrix
+
+    def search(self, probes, k=10):
+        """
+        Find the k nearest gallery faces for each probe encoding.
+
+        The memory-mapped matrix is scanned in blocks; each block is compared against
+        all probes at once with a single matrix product, and only the running top-k
+        per probe is kept, so memory stays bounded regardless of gallery size.
+
+        Args:
+            probes (array): One encoding or a (n, 128) batch of encodings
+            k (int): Number of neighbours to return per probe
+
+        Returns:
+            list: For each probe, a list of (index, distance) sorted by distance
+        """
+        probes = np.asarray(probes, dtype=np.float32).reshape(-1, ENCODING_SIZE)
+        matrix = self._records()
+        total = matrix.shape[0]
+        k = min(k, total)
+        if k <= 0:
+            return [[] for _ in range(len(probes))]
+
+        probe_norms = np.einsum("ij,ij->i", probes, probes)[:, None]
+        best_dist = np.full((len(probes), 0), np.inf, dtype=np.float32)
+        best_idx = np.empty((len(probes), 0), dtype=np.int64)
+
+        for start in range(0, total, self.block_size):
+            block = np.ascontiguousarray(matrix[start:start + self.block_size]["encoding"])
+            block_norms = np.einsum("ij,ij->i", block, block)[None, :]
+            # Squared euclidean distance: |p|^2 - 2 p.b + |b|^2
+            dist = probe_norms - 2.0 * probes @ block.T + block_norms
+
+            # Merge this block's candidates with the running top-k
+            cand_dist = np.concatenate([best_dist, dist], axis=1)
+            cand_idx = np.concatenate(
+                [best_idx, np.broadcast_to(np.arange(start, start + block.shape[0]), dist.shape)], axis=1)
+            if cand_dist.shape[1] > k:
+                keep = np.argpartition(cand_dist, k - 1, axis=1)[:, :k]
+                cand_dist = np.take_along_axis(cand_dist, keep, axis=1)
+                cand_idx = np.take_along_axis(cand_idx, keep, axis=1)
+            best_dist, best_idx = cand_dist, cand_idx
+
+        order = np.argsort(best_dist, axis=1)
+        best_dist = np.sqrt(np.maximum(np.take_along_axis(best_dist, order, axis=1), 0.0))
+        best_idx = np.take_along_axis(best_idx, order, axis=1)
+
+        return [list(zip(row_idx.tolist(), row_dist.tolist())) for row_idx, row_dist in zip(best_idx, best_dist)]
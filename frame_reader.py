@@ -0,0 +1,120 @@
+import queue
+import threading
+import time
+
+_END = object()  # Sentinel placed on the queue once the video is exhausted
+
+class FrameReader:
+    """
+    Decode-ahead frame source for the analysers.
+
+    A background thread reads frames from an opened cv2.VideoCapture into a bounded
+    queue while the caller runs detection on earlier frames. cv2 decoding and the
+    dlib/OpenCV detectors release the GIL, so decode and detection overlap on a
+    single video. Frames that are not sampled are only grabbed, never retrieved.
+
+    Usage:
+        with FrameReader(video, sample_rate=5) as reader:
+            for frame_number, frame in reader:
+                ...
+    """
+
+    def __init__(self, video, sample_rate=1, queue_size=32, start_index=0):
+        """
+        Args:
+            video: An opened cv2.VideoCapture
+            sample_rate (int): Yield every Nth frame
+            queue_size (int): Maximum number of decoded frames buffered ahead
+            start_index (int): Number given to the first frame of the video
+        """
+        self.video = video
+        self.sample_rate = max(1, int(sample_rate))
+        self.start_index = start_index
+        self.frames_read = 0
+        self.frames_yielded = 0
+        self.producer_stall = 0.0  # Seconds the reader waited for a free queue slot
+        self.consumer_stall = 0.0  # Seconds the analyser waited for a decoded frame
+        self._queue = queue.Queue(maxsize=max(1, int(queue_size)))
+        self._stop = threading.Event()
+        self._thread = None
+        self._error = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._produce, name="frame-reader", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the reader thread; safe to call more than once."""
+        self._stop.set()
+        if self._thread is not None:
+            # Drain so a producer blocked on put() notices the stop flag
+            while self._thread.is_alive():
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    self._thread.join(timeout=0.05)
+
+    def _put(self, item):
+        waited = time.perf_counter()
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        self.producer_stall += time.perf_counter() - waited
+
+    def _produce(self):
+        index = self.start_index
+        try:
+            while not self._stop.is_set():
+                if index % self.sample_rate != 0:
+                    # grab() advances without converting the frame to a numpy image
+                    if not self.video.grab():
+                        break
+                    self.frames_read += 1
+                    index += 1
+                    continue
+
+                success, frame = self.video.read()
+                if not success:
+                    break
+                self.frames_read += 1
+                self._put((index, frame))
+                index += 1
+        except Exception as e:
+            self._error = e
+        finally:
+            self._put(_END)
+
+    def __iter__(self):
+        self.start()
+        while True:
+            waited = time.perf_counter()
+            item = self._queue.get()
+            self.consumer_stall += time.perf_counter() - waited
+            if item is _END:
+                break
+            self.frames_yielded += 1
+            yield item
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def stats(self):
+        """Return decode/queue statistics for logging."""
+        return {
+            "frames_read": self.frames_read,
+            "frames_yielded": self.frames_yielded,
+            "queue_size": self._queue.maxsize,
+            "producer_stall_s": round(self.producer_stall, 3),
+            "consumer_stall_s": round(self.consumer_stall, 3),
+        }
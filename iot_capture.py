@@ -0,0 +1,271 @@
+import csv
+import os
+import struct
+from array import array
+from datetime import datetime, timezone
+import numpy as np
+
+# btsnoop timestamps count microseconds from midnight, January 1st, 0 AD
+BTSNOOP_EPOCH_DELTA_US = 0x00DCDDB30F2F8000
+
+BTSNOOP_MAGIC = b"btsnoop\0"
+PCAP_MAGICS = {
+    b"\xd4\xc3\xb2\xa1": ("<", 1e-6),
+    b"\xa1\xb2\xc3\xd4": (">", 1e-6),
+    b"\x4d\x3c\xb2\xa1": ("<", 1e-9),
+    b"\xa1\xb2\x3c\x4d": (">", 1e-9),
+}
+
+# Link types carrying Bluetooth HCI packets
+BTSNOOP_H1, BTSNOOP_H4 = 1001, 1002
+PCAP_ETHERNET, PCAP_BLUETOOTH_H4, PCAP_BLUETOOTH_H4_PHDR = 1, 187, 201
+
+HCI_PACKET_TYPES = {1: "hci_command", 2: "acl_data", 3: "sco_data", 4: "hci_event", 5: "iso_data"}
+IP_PROTOCOLS = {1: "icmp", 6: "tcp", 17: "udp"}
+
+# Device addresses (MAC, IPv4, "handle 0x001") fit in 17 ASCII bytes; b"" when unknown
+INDEX_DTYPE = np.dtype([("timestamp", "<f8"), ("offset", "<i8"), ("device", "S17")])
+
+class CaptureFormat:
+    """Layout of a capture file, read from its global header."""
+
+    def __init__(self, name, header_size, record_struct, datalink, time_scale=1e-6):
+        self.name = name
+        self.header_size = header_size
+        self.record_struct = record_struct
+        self.datalink = datalink
+        self.time_scale = time_scale
+
+def read_format(f):
+    """
+    Identify a btsnoop or pcap capture from its header.
+
+    Raises:
+        ValueError: If the file is neither format
+    """
+    f.seek(0)
+    header = f.read(24)
+    if header[:8] == BTSNOOP_MAGIC:
+        if len(header) < 16:
+            raise ValueError("Truncated btsnoop header")
+        _, datalink = struct.unpack(">II", header[8:16])
+        return CaptureFormat("btsnoop", 16, struct.Struct(">IIIIq"), datalink)
+    if header[:4] in PCAP_MAGICS and len(header) == 24:
+        endian, time_scale = PCAP_MAGICS[header[:4]]
+        datalink = struct.unpack(endian + "I", header[20:24])[0]
+        return CaptureFormat("pcap", 24, struct.Struct(endian + "IIII"), datalink, time_scale)
+    raise ValueError("Unsupported capture format; expected a btsnoop or pcap file")
+
+def _mac(raw):
+    """Format a little-endian Bluetooth address."""
+    return ":".join(f"{b:02X}" for b in reversed(raw))
+
+def _parse_hci(packet_type, data, row):
+    """Fill device details from an HCI packet body (without the H4 type byte)."""
+    row["kind"] = HCI_PACKET_TYPES.get(packet_type, f"hci_{packet_type}")
+    if packet_type == 2 and len(data) >= 2:
+        row["device"] = f"handle 0x{struct.unpack('<H', data[:2])[0] & 0x0FFF:03X}"
+    elif packet_type == 4 and len(data) >= 2:
+        code = data[0]
+        params = data[2:]
+        if code == 0x3E and len(params) >= 12 and params[0] == 0x02:
+            # LE Advertising Report: subevent, num_reports, event_type, addr_type, address, data_len, data, rssi
+            data_len = params[10]
+            row["kind"] = "le_advertisement"
+            row["device"] = _mac(params[4:10])
+            if len(params) > 11 + data_len:
+                row["rssi"] = struct.unpack("b", params[11 + data_len:12 + data_len])[0]
+        elif code == 0x03 and len(params) >= 9:
+            # Connection Complete: status, handle, address
+            row["kind"] = "connection_complete"
+            row["device"] = _mac(params[3:9])
+        elif code == 0x3E and len(params) >= 12 and params[0] == 0x01:
+            # LE Connection Complete: subevent, status, handle, role, addr_type, address
+            row["kind"] = "le_connection_complete"
+            row["device"] = _mac(params[6:12])
+        else:
+            row["summary"] = f"event 0x{code:02X}"
+    elif packet_type == 1 and len(data) >= 2:
+        row["summary"] = f"command 0x{struct.unpack('<H', data[:2])[0]:04X}"
+
+def _parse_ethernet(data, row):
+    row["kind"] = "packet"
+    if len(data) >= 34 and data[12:14] == b"\x08\x00":
+        ip = data[14:]
+        row["kind"] = IP_PROTOCOLS.get(ip[9], "ipv4")
+        row["device"] = ".".join(str(b) for b in ip[12:16])
+        row["summary"] = f"{row['device']} -> {'.'.join(str(b) for b in ip[16:20])}"
+
+def _to_row(fmt, header, data, offset):
+    """Normalise one capture record into a typed event row."""
+    row = {
+        "timestamp": 0.0,
+        "source": fmt.name,
+        "direction": None,
+        "kind": "packet",
+        "device": None,
+        "rssi": None,
+        "length": len(data),
+        "summary": "",
+        "offset": offset,
+    }
+    if fmt.name == "btsnoop":
+        _, _, flags, _, micros = header
+        row["timestamp"] = (micros - BTSNOOP_EPOCH_DELTA_US) / 1e6
+        row["direction"] = "received" if flags & 1 else "sent"
+        if fmt.datalink == BTSNOOP_H4 and data:
+            _parse_hci(data[0], data[1:], row)
+        elif fmt.datalink == BTSNOOP_H1:
+            packet_type = (4 if flags & 1 else 1) if flags & 2 else 2
+            _parse_hci(packet_type, data, row)
+    else:
+        seconds, fraction, _, _ = header
+        row["timestamp"] = seconds + fraction * fmt.time_scale
+        if fmt.datalink == PCAP_ETHERNET:
+            _parse_ethernet(data, row)
+        elif fmt.datalink == PCAP_BLUETOOTH_H4_PHDR and len(data) > 4:
+            row["direction"] = "received" if struct.unpack(">I", data[:4])[0] & 1 else "sent"
+            _parse_hci(data[4], data[5:], row)
+        elif fmt.datalink == PCAP_BLUETOOTH_H4 and data:
+            _parse_hci(data[0], data[1:], row)
+    if not row["summary"]:
+        row["summary"] = f"{row['kind']} {row['length']} bytes"
+    return row
+
+def _read_record(f, fmt):
+    """Read the record at the current position; returns (header, data) or None at end of file."""
+    raw = f.read(fmt.record_struct.size)
+    if len(raw) < fmt.record_struct.size:
+        return None
+    header = fmt.record_struct.unpack(raw)
+    included_length = header[1] if fmt.name == "btsnoop" else header[2]
+    data = f.read(included_length)
+    if len(data) < included_length:
+        return None  # Truncated final record, e.g. a capture still being written
+    return header, data
+
+def iter_events(path, buffer_size=1024 * 1024):
+    """
+    Parse a btsnoop or pcap capture incrementally, one record at a time.
+
+    Yields:
+        dict: Event row with timestamp (unix seconds), source, direction, kind,
+              device, rssi, length, summary and the record's byte offset
+    """
+    with open(path, "rb", buffering=buffer_size) as f:
+        fmt = read_format(f)
+        f.seek(fmt.header_size)
+        while True:
+            offset = f.tell()
+            record = _read_record(f, fmt)
+            if record is None:
+                break
+            yield _to_row(fmt, record[0], record[1], offset)
+
+class CaptureIndex:
+    """
+    Time index over a capture file.
+
+    The index is a sorted array of (timestamp, byte offset, device) rows saved next to
+    the capture and memory-mapped on load, so a time window is found with a binary
+    search and only the records inside it are read back from the capture.
+    """
+
+    def __init__(self, capture_path, index_path=None):
+        self.capture_path = capture_path
+        self.index_path = index_path or capture_path + ".idx.npy"
+        self._capture = None
+        if (not os.path.exists(self.index_path)
+                or os.path.getmtime(self.index_path) < os.path.getmtime(capture_path)):
+            self.build()
+        self.index = np.load(self.index_path, mmap_mode="r")
+        if self.index.dtype != INDEX_DTYPE:  # Written by an older version
+            self.build()
+            self.index = np.load(self.index_path, mmap_mode="r")
+
+    def build(self):
+        """Parse the whole capture once and write the sorted time index."""
+        # Compact typed arrays keep multi-million record captures affordable in memory
+        timestamps = array("d")
+        offsets = array("q")
+        devices = bytearray()
+        for event in iter_events(self.capture_path):
+            timestamps.append(event["timestamp"])
+            offsets.append(event["offset"])
+            devices += (event["device"] or "").encode("ascii", "replace")[:17].ljust(17, b"\0")
+
+        index = np.empty(len(timestamps), dtype=INDEX_DTYPE)
+        index["timestamp"] = np.frombuffer(timestamps, dtype=np.float64) if timestamps else []
+        index["offset"] = np.frombuffer(offsets, dtype=np.int64) if offsets else []
+        index["device"] = np.frombuffer(bytes(devices), dtype="S17") if devices else []
+        # Captures are nearly always in order already; a stable sort keeps ties in file order
+        index = index[np.argsort(index["timestamp"], kind="stable")]
+
+        temp_path = self.index_path + ".part.npy"
+        np.save(temp_path, index)
+        os.replace(temp_path, self.index_path)
+
+    def __len__(self):
+        return len(self.index)
+
+    def time_range(self):
+        """Return the (first, last) event timestamps, or None for an empty capture."""
+        if len(self.index) == 0:
+            return None
+        return float(self.index["timestamp"][0]), float(self.index["timestamp"][-1])
+
+    def span(self, start=None, end=None):
+        """Return the (lo, hi) index positions of the events with start <= timestamp < end."""
+        timestamps = self.index["timestamp"]
+        lo = 0 if start is None else int(np.searchsorted(timestamps, start, side="left"))
+        hi = len(timestamps) if end is None else int(np.searchsorted(timestamps, end, side="left"))
+        return lo, max(lo, hi)
+
+    def query(self, start=None, end=None, limit=None):
+        """
+        Return the events with start <= timestamp < end, in time order.
+
+        Args:
+            start (float): Window start in unix seconds (None for the beginning)
+            end (float): Window end in unix seconds (None for the end)
+            limit (int): Maximum number of events to return
+        """
+        lo, hi = self.span(start, end)
+        if limit is not None:
+            hi = min(hi, lo + limit)
+
+        events = []
+        with open(self.capture_path, "rb") as f:
+            fmt = read_format(f)
+            for offset in self.index["offset"][lo:hi]:
+                f.seek(int(offset))
+                header, data = _read_record(f, fmt)
+                events.append(_to_row(fmt, header, data, int(offset)))
+        return events
+
+    def read(self, position):
+        """Parse the single event at an index position, keeping the capture open for further reads."""
+        if self._capture is None:
+            f = open(self.capture_path, "rb")
+            self._capture = (f, read_format(f))
+        f, fmt = self._capture
+        offset = int(self.index["offset"][position])
+        f.seek(offset)
+        header, data = _read_record(f, fmt)
+        return _to_row(fmt, header, data, offset)
+
+    def close(self):
+        if self._capture is not None:
+            self._capture[0].close()
+            self._capture = None
+
+def export_csv(events, csv_path):
+    """Write event rows as a When/Where/Why/What CSV for the evidence table."""
+    with open(csv_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["When", "Where", "Why", "What"])
+        for event in events:
+            when = datetime.fromtimestamp(event["timestamp"], tz=timezone.utc).isoformat()
+            where = event["device"] or ""
+            what = event["summary"] if event["rssi"] is None else f"{event['summary']} (RSSI {event['rssi']} dBm)"
+            writer.writerow([when, where, event["kind"], what])
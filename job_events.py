@@ -0,0 +1,184 @@
+import asyncio
+import json
+import os
+import subprocess
+import uuid
+from collections import deque
+
+EVENT_PREFIX = "@@EVENT "  # Marks analyser stdout lines that carry a JSON event
+
+# In-memory registry of analysis jobs, keyed by job id
+JOBS = {}
+
+class Job:
+    """
+    A single analysis run and the events it has produced so far.
+
+    Events are kept in an append-only list; every viewer holds its own cursor into
+    it, so publishing is O(1) and the analyser never waits on slow viewers.
+    """
+
+    def __init__(self, video_path):
+        self.id = uuid.uuid4().hex
+        self.video_path = video_path
+        self.status = "queued"
+        self.events = []
+        self.progress = None
+        self.detections = 0
+        self.alerts = 0
+        self.returncode = None
+        self.output = deque(maxlen=200)  # Tail of non-event analyser output
+        self.output_dir = None  # Folder the analyser writes this job's log, frames and crops to
+        self.priority = 0
+        self._loop = None
+        self._changed = None
+
+    def bind(self, loop):
+        """Attach the job to the server's event loop; must be called from that loop."""
+        self._loop = loop
+        self._changed = asyncio.Event()
+
+    def publish(self, event):
+        """Append an event and wake waiting viewers. Must run on the job's loop."""
+        event["id"] = len(self.events)
+        self.events.append(event)
+        if event["type"] == "progress":
+            self.progress = event
+        elif event["type"] == "detection":
+            self.detections += 1
+        elif event["type"] == "alert":
+            self.alerts += 1
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def publish_threadsafe(self, event):
+        self._loop.call_soon_threadsafe(self.publish, event)
+
+    @property
+    def finished(self):
+        return self.status in ("complete", "failed")
+
+    async def stream(self, start=0):
+        """Yield events from index `start` onwards until the job has finished."""
+        cursor = start
+        while True:
+            changed = self._changed
+            while cursor < len(self.events):
+                yield self.events[cursor]
+                cursor += 1
+            if self.finished:
+                break
+            await changed.wait()
+
+    def summary(self):
+        return {
+            "job_id": self.id,
+            "video_path": self.video_path,
+            "status": self.status,
+            "priority": self.priority,
+            "progress": self.progress,
+            "detections": self.detections,
+            "alerts": self.alerts,
+            "returncode": self.returncode,
+            "output_dir": self.output_dir,
+            "events": len(self.events),
+        }
+
+def create_job(video_path, output_root=None):
+    """
+    Register a new job bound to the running event loop.
+    With output_root, the job gets its own output folder output_root/<job_id>.
+    """
+    job = Job(video_path)
+    if output_root is not None:
+        job.output_dir = os.path.join(output_root, job.id)
+    job.bind(asyncio.get_running_loop())
+    JOBS[job.id] = job
+    return job
+
+def _with_urls(event, output_dir):
+    """Add a browser URL for crops saved in the job's output folder (served relative to the working directory)."""
+    crop = event.get("crop")
+    if crop and output_dir:
+        relative = os.path.relpath(os.path.abspath(crop), os.path.abspath(output_dir))
+        if not relative.startswith(os.pardir):  # Only link files that belong to this job
+            event["crop_url"] = "/" + os.path.relpath(os.path.join(output_dir, relative)).replace(os.sep, "/")
+    return event
+
+def _run_analyser(job, command):
+    """Run the analyser subprocess and forward its events (runs on a worker thread)."""
+    job.publish_threadsafe({"type": "status", "status": "running"})
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                               text=True, bufsize=1)
+    for line in process.stdout:
+        line = line.strip()
+        if line.startswith(EVENT_PREFIX):
+            try:
+                event = json.loads(line[len(EVENT_PREFIX):])
+            except ValueError:
+                job.output.append(line)
+                continue
+            job.publish_threadsafe(_with_urls(event, job.output_dir))
+        elif line:
+            job.output.append(line)
+    return process.wait()
+
+async def run_job(job, command):
+    """
+    Run an analyser command for a job, streaming its events into the job.
+
+    Args:
+        job (Job): Job created with create_job
+        command (list): Analyser command line; it must be started with --events
+    """
+    job.status = "running"
+    try:
+        job.returncode = await asyncio.to_thread(_run_analyser, job, command)
+        job.status = "complete" if job.returncode == 0 else "failed"
+    except Exception as e:
+        job.output.append(f"Error: {str(e)}")
+        job.status = "failed"
+    job.publish({"type": "done", "status": job.status, "returncode": job.returncode})
+
+class JobScheduler:
+    """
+    Runs queued jobs on a fixed number of workers, lowest priority value first.
+    Jobs with equal priority run in submission order.
+    """
+
+    def __init__(self, workers=2):
+        self.workers = workers
+        self._queue = None
+        self._tasks = []
+        self._sequence = 0
+
+    def _start(self):
+        self._queue = asyncio.PriorityQueue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def _worker(self):
+        while True:
+            _, _, job, command = await self._queue.get()
+            try:
+                await run_job(job, command)
+            finally:
+                self._queue.task_done()
+
+    def submit(self, job, command, priority=0):
+        """
+        Queue a job for analysis. Must be called from the server's event loop.
+
+        Args:
+            job (Job): Job created with create_job
+            command (list): Analyser command line, started with --events
+            priority (int): Lower values run first
+        """
+        if self._queue is None:
+            self._start()
+        job.priority = priority
+        self._sequence += 1
+        self._queue.put_nowait((priority, self._sequence, job, command))
+
+def format_sse(event):
+    """Format an event as a Server-Sent Events message."""
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
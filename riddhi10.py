@@ -1,11 +1,16 @@
+import argparse
 import cv2
 import os
 import face_recognition
 import time
 import numpy as np
 from datetime import datetime
+from face_gallery import FaceGallery
+from frame_reader import FrameReader
+from correlation import estimate_video_start
+from roi import RegionOfInterest, load_roi
 
-def extract_faces_from_video(video_path, output_dir, sample_rate=30, min_face_size=(50, 50), confidence_threshold=0.6):
+def extract_faces_from_video(video_path, output_dir, sample_rate=30, min_face_size=(50, 50), confidence_threshold=0.6, gallery=None, queue_size=32, roi=None):
     """
     Extracts faces from video frames and saves them to an output directory.
     
@@ -15,6 +20,9 @@ def extract_faces_from_video(video_path, output_dir, sample_rate=30, min_face_si
         sample_rate (int): Process every Nth frame
         min_face_size (tuple): Minimum face size to detect (width, height)
         confidence_threshold (float): Minimum confidence for face detection
+        gallery (FaceGallery): Optional persistent gallery to record every unique face in
+        queue_size (int): Number of frames decoded ahead of detection
+        roi (RegionOfInterest): Optional region of interest; faces are only searched inside it
     """
     # Create output directory if it doesn't exist
     if not os.path.exists(output_dir):
@@ -27,28 +35,35 @@ def extract_faces_from_video(video_path, output_dir, sample_rate=30, min_face_si
         print(f"Error: Could not open video file {video_path}")
         return
     
+    fps = video.get(cv2.CAP_PROP_FPS) or 30.0
+    video_start = estimate_video_start(video_path, video.get(cv2.CAP_PROP_FRAME_COUNT) / fps)
     frame_count = 0
     saved_count = 0
     previously_seen_faces = []
     
     print(f"Processing video: {video_path}")
     
-    while True:
-        # Read the next frame
-        success, frame = video.read()
-        if not success:
-            break
-        
-        # Process only every Nth frame for efficiency
-        if frame_count % sample_rate == 0:
+    # Frames are decoded on a background thread while detection runs on earlier ones;
+    # only every Nth frame is handed over for efficiency
+    with FrameReader(video, sample_rate=sample_rate, queue_size=queue_size) as reader:
+        for frame_count, frame in reader:
             print(f"Processing frame {frame_count}...")
             
+            # Restrict detection to the camera's region of interest
+            if roi is not None:
+                roi_frame, (x_offset, y_offset) = roi.apply(frame)
+            else:
+                roi_frame, (x_offset, y_offset) = frame, (0, 0)
+            
             # Convert BGR to RGB (face_recognition uses RGB)
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            rgb_frame = cv2.cvtColor(roi_frame, cv2.COLOR_BGR2RGB)
             
             # Find all faces in the frame
             face_locations = face_recognition.face_locations(rgb_frame)
             face_encodings = face_recognition.face_encodings(rgb_frame, face_locations)
+            # Map face locations from the region of interest back to full-frame coordinates
+            face_locations = [(top + y_offset, right + x_offset, bottom + y_offset, left + x_offset)
+                              for top, right, bottom, left in face_locations]
             
             for (top, right, bottom, left), face_encoding in zip(face_locations, face_encodings):
                 # Check if face meets minimum size requirement
@@ -81,28 +96,48 @@ def extract_faces_from_video(video_path, output_dir, sample_rate=30, min_face_si
                     cv2.imwrite(face_filename, face_image)
                     saved_count += 1
                     
+                    # Record the face in the cross-case gallery
+                    if gallery is not None:
+                        gallery.add(face_encoding, video_path, frame_count, frame_count / fps, face_filename,
+                                video_start=video_start)
+                    
                     print(f"Saved face #{saved_count} to {face_filename}")
-        
-        frame_count += 1
     
+    frame_count = reader.frames_read
     video.release()
+    print(f"Decode-ahead stats: {reader.stats()}")
     print(f"Finished processing. Processed {frame_count} frames and saved {saved_count} unique faces.")
 
 def main():
     """
     Main function to run the face extraction script.
     """
-    # Configuration
-    video_path = "C:\\Users\\ragha\\OneDrive\\Documents\\DEV\\hackathons\\cidecode\\face.mp4"  # Replace with your actual video file name
-    output_dir = "extracted_faces"
-    sample_rate = 5  # Process every 5th frame for efficiency
+    parser = argparse.ArgumentParser(description="Extract unique faces from a video into the face gallery")
+    parser.add_argument("video_path", nargs="?", default="C:\\Users\\ragha\\OneDrive\\Documents\\DEV\\hackathons\\cidecode\\face.mp4", help="Path to the video file")
+    parser.add_argument("--output-dir", default="extracted_faces", help="Folder to save face crops in")
+    parser.add_argument("--sample-rate", type=int, default=5, help="Process every nth frame")
+    parser.add_argument("--queue-size", type=int, default=32, help="Frames decoded ahead of detection")
+    parser.add_argument("--camera", help="Camera profile whose region of interest limits detection")
+    args = parser.parse_args()
+    
+    min_face_size = (50, 50)
+    roi = None
+    if args.camera:
+        roi_definition = load_roi(args.camera)
+        if roi_definition is None:
+            print(f"Warning: no region of interest stored for camera {args.camera}, scanning full frames")
+        else:
+            roi = RegionOfInterest(roi_definition, min_size=min_face_size)
     
     extract_faces_from_video(
-        video_path=video_path,
-        output_dir=output_dir,
-        sample_rate=sample_rate,
-        min_face_size=(50, 50),
-        confidence_threshold=0.6
+        video_path=args.video_path,
+        output_dir=args.output_dir,
+        sample_rate=args.sample_rate,
+        queue_size=args.queue_size,
+        min_face_size=min_face_size,
+        confidence_threshold=0.6,
+        gallery=FaceGallery(),
+        roi=roi
     )
 
 if __name__ == "__main__":
@@ -0,0 +1,129 @@
+import json
+import os
+import numpy as np
+
+CAMERA_PROFILE_DIR = "camera_profiles"
+
+# Smallest crop worth handing to a detector; detectors downscale by 2, so anything
+# smaller collapses to nothing and OpenCV rejects it
+MIN_CROP_SIZE = (2, 2)
+
+def validate_roi(roi):
+    """
+    Check a region-of-interest definition.
+
+    A definition is a dict with optional "rects" ([x, y, w, h] each) and "polygons"
+    (lists of [x, y] points). Coordinates are fractions of the frame width/height,
+    so one profile works for every resolution the camera records at.
+
+    Raises:
+        ValueError: If the definition is malformed
+    """
+    if not isinstance(roi, dict):
+        raise ValueError("ROI must be an object with 'rects' and/or 'polygons'")
+    rects = roi.get("rects", [])
+    polygons = roi.get("polygons", [])
+    if not rects and not polygons:
+        raise ValueError("ROI must define at least one rect or polygon")
+
+    values = []
+    for rect in rects:
+        if len(rect) != 4 or rect[2] <= 0 or rect[3] <= 0:
+            raise ValueError(f"Invalid rect {rect}; expected [x, y, w, h] with positive size")
+        values.extend([rect[0], rect[1], rect[0] + rect[2], rect[1] + rect[3]])
+    for polygon in polygons:
+        if len(polygon) < 3 or any(len(point) != 2 for point in polygon):
+            raise ValueError(f"Invalid polygon {polygon}; expected at least 3 [x, y] points")
+        values.extend(value for point in polygon for value in point)
+    if any(not 0.0 <= float(value) <= 1.0 for value in values):
+        raise ValueError("ROI coordinates must be fractions of the frame size between 0 and 1")
+    return {"rects": rects, "polygons": polygons}
+
+def profile_path(camera, profile_dir=CAMERA_PROFILE_DIR):
+    return os.path.join(profile_dir, f"{os.path.basename(camera)}.json")
+
+def load_roi(camera, profile_dir=CAMERA_PROFILE_DIR):
+    """Return the stored ROI definition for a camera, or None if it has none."""
+    path = profile_path(camera, profile_dir)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return validate_roi(json.load(f).get("roi"))
+
+def save_roi(camera, roi, profile_dir=CAMERA_PROFILE_DIR):
+    """Validate and store the ROI definition for a camera."""
+    roi = validate_roi(roi)
+    os.makedirs(profile_dir, exist_ok=True)
+    with open(profile_path(camera, profile_dir), "w") as f:
+        json.dump({"camera": camera, "roi": roi}, f, indent=2)
+    return roi
+
+class RegionOfInterest:
+    """
+    Crops and masks frames to a camera's region of interest before detection.
+
+    Frames are cropped to the bounding box of all regions; pixels inside that box
+    but outside every region are blacked out. Detector coordinates found in the
+    crop are mapped back to the full frame by adding `offset`. A region smaller than
+    `min_size` (width, height) in pixels at the current frame size is ignored and the
+    full frame is scanned instead.
+    """
+
+    def __init__(self, roi, min_size=MIN_CROP_SIZE):
+        self.roi = validate_roi(roi)
+        self.min_size = (max(int(min_size[0]), MIN_CROP_SIZE[0]), max(int(min_size[1]), MIN_CROP_SIZE[1]))
+        self._shape = None
+        self.box = None
+        self.mask = None
+
+    def _build(self, height, width):
+        import cv2  # Only needed once per frame size
+
+        scale = np.array([width, height], dtype=np.float64)
+        shapes = []
+        for x, y, w, h in self.roi["rects"]:
+            shapes.append(np.array([[x, y], [x + w, y], [x + w, y + h], [x, y + h]]) * scale)
+        for polygon in self.roi["polygons"]:
+            shapes.append(np.array(polygon, dtype=np.float64) * scale)
+        shapes = [np.round(shape).astype(np.int32) for shape in shapes]
+
+        points = np.concatenate(shapes)
+        x0, y0 = np.clip(points.min(axis=0), 0, [width, height])
+        x1, y1 = np.clip(points.max(axis=0), 0, [width, height])
+        self.box = (int(x0), int(y0), int(x1), int(y1))
+        self._shape = (height, width)
+
+        # A region that rounds to (almost) nothing at this frame size cannot hold a detection
+        if x1 - x0 < self.min_size[0] or y1 - y0 < self.min_size[1]:
+            print(f"Warning: region of interest is only {x1 - x0}x{y1 - y0} px at {width}x{height}, "
+                  f"scanning full frames")
+            self.box = (0, 0, width, height)
+            self.mask = None
+            return
+
+        # A single rectangle is fully described by the crop, so no mask is needed
+        if len(shapes) == 1 and not self.roi["polygons"]:
+            self.mask = None
+        else:
+            mask = np.zeros((self.box[3] - self.box[1], self.box[2] - self.box[0]), dtype=np.uint8)
+            cv2.fillPoly(mask, [shape - [x0, y0] for shape in shapes], 255)
+            self.mask = mask
+
+    @property
+    def offset(self):
+        return self.box[0], self.box[1]
+
+    def apply(self, frame):
+        """
+        Return the part of the frame to run detection on and its (x, y) offset
+        within the full frame.
+        """
+        height, width = frame.shape[:2]
+        if self._shape != (height, width):
+            self._build(height, width)
+        x0, y0, x1, y1 = self.box
+        crop = frame[y0:y1, x0:x1]
+        if self.mask is not None:
+            crop = crop.copy()
+            crop[self.mask == 0] = 0
+        return crop, self.offset
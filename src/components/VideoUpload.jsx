@@ -1,13 +1,45 @@
 import axios from 'axios';
-import { useState } from 'react';
+import { useEffect, useRef, useState } from 'react';
+
+const API_URL = "http://127.0.0.1:8000";
 
 function VideoUpload() {
     const [selectedFile, setSelectedFile] = useState(null);
+    const [progress, setProgress] = useState(null);
+    const [detections, setDetections] = useState([]);
+    const [alerts, setAlerts] = useState([]);
+    const [status, setStatus] = useState("");
+    const eventSourceRef = useRef(null);
+
+    // Close the live stream when the component unmounts
+    useEffect(() => () => eventSourceRef.current?.close(), []);
 
     const handleFileChange = (event) => {
         setSelectedFile(event.target.files[0]);
     };
 
+    const followJob = (eventsUrl) => {
+        eventSourceRef.current?.close();
+        const eventSource = new EventSource(`${API_URL}${eventsUrl}`);
+        eventSourceRef.current = eventSource;
+
+        eventSource.addEventListener("progress", (event) => {
+            setProgress(JSON.parse(event.data));
+        });
+        eventSource.addEventListener("detection", (event) => {
+            const detection = JSON.parse(event.data);
+            setDetections((previous) => [...previous, detection]);
+        });
+        eventSource.addEventListener("alert", (event) => {
+            const alert = JSON.parse(event.data);
+            setAlerts((previous) => [...previous, alert]);
+        });
+        eventSource.addEventListener("done", (event) => {
+            setStatus(`Processing ${JSON.parse(event.data).status}`);
+            eventSource.close();
+        });
+    };
+
     const handleUpload = async () => {
         if (!selectedFile) {
             alert("Please select a file first.");
@@ -18,15 +50,22 @@ function VideoUpload() {
         formData.append("file", selectedFile);
 
         try {
-            const response = await axios.post("http://127.0.0.1:8000/upload/", formData, {
+            setProgress(null);
+            setDetections([]);
+            setAlerts([]);
+            setStatus("Uploading...");
+            const response = await axios.post(`${API_URL}/jobs/`, formData, {
                 headers: {
                     "Content-Type": "multipart/form-data",
                 },
             });
 
             console.log("Upload successful:", response.data);
+            setStatus("Processing...");
+            followJob(response.data.events_url);
         } catch (error) {
             console.error("Upload error:", error);
+            setStatus("Upload failed");
         }
     };
 
@@ -34,6 +73,32 @@ function VideoUpload() {
         <div>
             <input type="file" onChange={handleFileChange} />
             <button onClick={handleUpload}>Upload</button>
+            {status && <p>{status}</p>}
+            {progress && (
+                <p>
+                    Frame {progress.frame}/{progress.total_frames} - {progress.fps} fps
+                    {progress.eta_s !== null && ` - ETA ${progress.eta_s}s`}
+                </p>
+            )}
+            {alerts.map((alert) => (
+                <p key={alert.id} style={{ color: "red" }}>
+                    Watchlist alert: {alert.text} matches {alert.match.plate}
+                    {!alert.match.exact && ` (approximate, ${alert.match.edit_distance} character(s) differ)`}
+                    {alert.match.info && ` (${alert.match.info})`} @ {alert.timestamp}s
+                </p>
+            ))}
+            <div style={{ display: "flex", flexWrap: "wrap" }}>
+                {detections.map((detection) => (
+                    <div key={detection.id} style={{ margin: "10px" }}>
+                        <img
+                            src={`${API_URL}${detection.crop_url}`}
+                            alt={detection.text}
+                            style={{ width: "150px", borderRadius: "5px" }}
+                        />
+                        <p>{detection.text} @ {detection.timestamp}s</p>
+                    </div>
+                ))}
+            </div>
         </div>
     );
 }
@@ -0,0 +1,78 @@
+import numpy as np
+from correlation import capture_event_source, correlate, list_event_source, merge_windows, window_join
+
+def test_window_join_bounds_are_inclusive():
+    event_times = [30.0, 10.0, 20.0, 21.0, 5.0]
+    order, lo, hi = window_join([20.0, 100.0, 0.0], event_times, window=5.0)
+    sorted_times = np.asarray(event_times)[order]
+    assert sorted_times.tolist() == [5.0, 10.0, 20.0, 21.0, 30.0]
+    assert sorted_times[lo[0]:hi[0]].tolist() == [20.0, 21.0]  # 15..25
+    assert lo[1] == hi[1]                                       # Nothing near 100
+    assert sorted_times[lo[2]:hi[2]].tolist() == [5.0]          # -5..5 includes 5
+
+def test_window_join_matches_brute_force():
+    rng = np.random.default_rng(0)
+    event_times = rng.uniform(0, 1000, 500)
+    detection_times = rng.uniform(0, 1000, 50)
+    order, lo, hi = window_join(detection_times, event_times, window=10.0)
+    for t, start, end in zip(detection_times, lo, hi):
+        expected = np.flatnonzero(np.abs(event_times - t) <= 10.0)
+        assert sorted(order[start:end].tolist()) == expected.tolist()
+
+def test_merge_windows():
+    assert merge_windows([10.0, 1.0, 3.0, 30.0], 2.0) == [(-1.0, 5.0), (8.0, 12.0), (28.0, 32.0)]
+    assert merge_windows([], 2.0) == []
+
+def test_correlate_reports_nearest_events_and_counts_devices_once():
+    events = [{"time": t, "device": d} for t, d in
+              [(95.0, "phone"), (99.0, "phone"), (102.0, "watch"), (104.0, None), (150.0, "car")]]
+    detections = [{"time": 100.0}, {"time": 101.0}]
+    event_times, event_devices, get_event = list_event_source(events)
+    requested = []
+
+    def counting_get_event(position):
+        requested.append(position)
+        return get_event(position)
+
+    timeline = correlate(detections, event_times, event_devices, counting_get_event, window=5.0, max_events=2)
+
+    first = timeline["matches"][0]
+    assert first["event_count"] == 4
+    assert [e["delta_s"] for e in first["events"]] == [-1.0, 2.0]
+    # Both detections see the same events, but each device is counted once per event
+    assert {d["device"]: d["count"] for d in timeline["devices"]} == {"phone": 2, "watch": 1}
+    # Only reported events were materialised, each once
+    assert sorted(requested) == [1, 2]
+
+def test_capture_source_reads_only_reported_records(tmp_path):
+    import os
+    from conftest import FIXTURES_DIR
+    from iot_capture import CaptureIndex
+
+    index = CaptureIndex(os.path.join(FIXTURES_DIR, "ipv4.pcap"), index_path=str(tmp_path / "ipv4.idx.npy"))
+    t0 = float(index.index["timestamp"][0])
+    event_times, event_devices, get_event = capture_event_source(index, [(t0 - 1, t0 + 1), (t0 + 1.5, t0 + 10)])
+    assert event_devices.tolist() == ["192.168.1.10", "10.0.0.5"]
+
+    timeline = correlate([{"time": t0 + 2.5}], event_times, event_devices, get_event, window=5.0, max_events=1)
+    index.close()
+    assert [e["kind"] for e in timeline["matches"][0]["events"]] == ["tcp"]
+    assert timeline["matches"][0]["event_count"] == 2
+    assert {d["device"] for d in timeline["devices"]} == {"192.168.1.10", "10.0.0.5"}
+
+def test_faces_are_decoded_only_near_events(tmp_path):
+    from correlation import face_times, load_face_detections
+    from face_gallery import FaceGallery
+
+    gallery = FaceGallery(str(tmp_path / "gallery"))
+    for i in range(5):
+        gallery.add(np.zeros(128), "video.mp4", i, float(i * 100), f"face_{i}.jpg", video_start=1000.0)
+    gallery.add(np.zeros(128), "other.mp4", 0, 0.0, "unknown.jpg")  # No recording start
+
+    indexes, times = face_times(gallery)
+    assert indexes.tolist() == [0, 1, 2, 3, 4]
+    assert times.tolist() == [1000.0, 1100.0, 1200.0, 1300.0, 1400.0]
+
+    _, lo, hi = window_join(times, [1205.0], window=10.0)
+    faces = load_face_detections(gallery, indexes[hi > lo])
+    assert [(f["index"], f["time"], f["crop_path"]) for f in faces] == [(2, 1200.0, "face_2.jpg")]
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from face_gallery import FaceGallery
+
+def make_gallery(tmp_path, count=300, block_size=64):
+    gallery = FaceGallery(str(tmp_path / "gallery"), block_size=block_size)
+    encodings = np.random.default_rng(0).normal(0, 0.1, (count, 128)).astype(np.float32)
+    for i, encoding in enumerate(encodings):
+        assert gallery.add(encoding, "video.mp4", i, i / 30, f"face_{i}.jpg") == i
+    return gallery, encodings
+
+def test_search_matches_brute_force(tmp_path):
+    gallery, encodings = make_gallery(tmp_path)
+    probes = encodings[[3, 150, 299]] + 0.01
+    results = gallery.search(probes, k=5)
+
+    for probe, neighbours in zip(probes, results):
+        distances = np.linalg.norm(encodings - probe, axis=1)
+        assert [index for index, _ in neighbours] == np.argsort(distances)[:5].tolist()
+        assert [distance for _, distance in neighbours] == pytest.approx(np.sort(distances)[:5].tolist(), abs=1e-4)
+
+def test_search_single_probe_and_small_gallery(tmp_path):
+    gallery, encodings = make_gallery(tmp_path, count=3)
+    results = gallery.search(encodings[1], k=10)
+    assert len(results) == 1
+    assert len(results[0]) == 3  # k is capped at the gallery size
+    assert results[0][0][0] == 1
+
+def test_empty_gallery(tmp_path):
+    gallery = FaceGallery(str(tmp_path / "gallery"))
+    assert len(gallery) == 0
+    assert gallery.search(np.zeros((2, 128)), k=5) == [[], []]
+
+def test_metadata_and_reopen(tmp_path):
+    gallery, encodings = make_gallery(tmp_path, count=10)
+    assert gallery.metadata(7)["crop_path"] == "face_7.jpg"
+
+    # A crash can leave a partial record; reopening drops it and later rows stay aligned
+    with open(gallery.records_path, "ab") as records:
+        records.write(b"\0" * 100)
+    reopened = FaceGallery(gallery.gallery_dir)
+    assert len(reopened) == 10
+    assert reopened.add(encodings[0], "other.mp4", 0, 0.0, "new.jpg") == 10
+    assert reopened.metadata(10)["video"] == "other.mp4"
+    assert [index for index, _ in reopened.entries()] == list(range(11))
@@ -0,0 +1,68 @@
+import threading
+import time
+import pytest
+from frame_reader import FrameReader
+
+class FakeVideo:
+    """Stands in for cv2.VideoCapture; frame i is the integer i (counting from 0)."""
+
+    def __init__(self, frames=None, fail_at=None):
+        self.frames = frames  # None for an endless video
+        self.fail_at = fail_at
+        self.position = 0
+        self.retrieved = []
+
+    def _advance(self):
+        if self.fail_at is not None and self.position == self.fail_at:
+            raise RuntimeError("decoder error")
+        if self.frames is not None and self.position >= self.frames:
+            return False
+        self.position += 1
+        return True
+
+    def grab(self):
+        return self._advance()
+
+    def read(self):
+        if not self._advance():
+            return False, None
+        self.retrieved.append(self.position - 1)
+        return True, self.position - 1
+
+def test_numbering_with_start_index_and_sample_rate():
+    video = FakeVideo(frames=12)
+    with FrameReader(video, sample_rate=5, start_index=1) as reader:
+        items = list(reader)
+    # Frame numbers count from 1, so the 5th and 10th frames (positions 4 and 9) are sampled
+    assert items == [(5, 4), (10, 9)]
+    assert video.retrieved == [4, 9]  # Skipped frames are only grabbed
+    assert reader.stats()["frames_read"] == 12
+
+    with FrameReader(FakeVideo(frames=12), sample_rate=5) as reader:
+        assert list(reader) == [(0, 0), (5, 5), (10, 10)]
+
+def test_reader_errors_reach_the_consumer():
+    reader = FrameReader(FakeVideo(frames=10, fail_at=3), queue_size=2)
+    seen = []
+    with pytest.raises(RuntimeError, match="decoder error"):
+        with reader:
+            for frame_number, _ in reader:
+                seen.append(frame_number)
+    assert seen == [0, 1, 2]
+
+def test_stop_while_producer_blocked_on_full_queue():
+    reader = FrameReader(FakeVideo(), queue_size=1)
+    with reader:
+        iterator = iter(reader)
+        assert next(iterator) == (0, 0)
+        # Give the producer time to fill the queue and block on the next put
+        deadline = time.time() + 2
+        while not reader._queue.full() and time.time() < deadline:
+            time.sleep(0.01)
+        assert reader._queue.full()
+
+        stopper = threading.Thread(target=reader.stop)
+        stopper.start()
+        stopper.join(timeout=2)
+        assert not stopper.is_alive()
+    assert not reader._thread.is_alive()
@@ -0,0 +1,88 @@
+import os
+import pytest
+from conftest import FIXTURES_DIR
+from iot_capture import CaptureIndex, iter_events
+
+T0 = 1767225600.0  # 2026-01-01T00:00:00Z, the first record of every fixture capture
+
+def fixture(name):
+    return os.path.join(FIXTURES_DIR, name)
+
+def index(name, tmp_path):
+    # Keep the built index out of the fixtures folder
+    return CaptureIndex(fixture(name), index_path=str(tmp_path / (name + ".idx.npy")))
+
+def test_btsnoop_le_advertisement():
+    events = list(iter_events(fixture("le_advertisement.btsnoop")))
+    assert len(events) == 2
+
+    advertisement, acl = events
+    assert advertisement["source"] == "btsnoop"
+    assert advertisement["kind"] == "le_advertisement"
+    assert advertisement["device"] == "AA:BB:CC:DD:EE:FF"
+    assert advertisement["rssi"] == -60
+    assert advertisement["direction"] == "received"
+    assert advertisement["timestamp"] == pytest.approx(T0)
+    assert advertisement["offset"] == 16  # Right after the btsnoop header
+
+    assert acl["kind"] == "acl_data"
+    assert acl["device"] == "handle 0x001"
+    assert acl["direction"] == "sent"
+    assert acl["timestamp"] == pytest.approx(T0 + 1.5)
+
+def test_pcap_ethernet_ipv4():
+    events = list(iter_events(fixture("ipv4.pcap")))
+    assert [e["kind"] for e in events] == ["udp", "tcp"]
+    assert events[0]["device"] == "192.168.1.10"
+    assert events[0]["summary"] == "192.168.1.10 -> 192.168.1.1"
+    assert events[0]["timestamp"] == pytest.approx(T0 + 0.25)
+    assert events[0]["offset"] == 24  # Right after the pcap header
+    assert events[1]["device"] == "10.0.0.5"
+    assert events[1]["timestamp"] == pytest.approx(T0 + 2)
+
+def test_truncated_final_record_is_skipped(tmp_path):
+    events = list(iter_events(fixture("truncated.pcap")))
+    assert [e["device"] for e in events] == ["192.168.1.10"]
+    assert len(index("truncated.pcap", tmp_path)) == 1
+
+def test_empty_capture(tmp_path):
+    assert list(iter_events(fixture("empty.btsnoop"))) == []
+    capture = index("empty.btsnoop", tmp_path)
+    assert len(capture) == 0
+    assert capture.time_range() is None
+    assert capture.query(T0 - 10, T0 + 10) == []
+
+def test_unknown_format(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_bytes(b"not a capture at all")
+    with pytest.raises(ValueError):
+        list(iter_events(str(path)))
+
+def test_truncated_header(tmp_path):
+    for header in (b"btsnoop\0\0\0", b"\xd4\xc3\xb2\xa1\x02\x00"):
+        path = tmp_path / "short.cap"
+        path.write_bytes(header)
+        with pytest.raises(ValueError):
+            list(iter_events(str(path)))
+
+def test_query_window_bounds(tmp_path):
+    capture = index("ipv4.pcap", tmp_path)
+    assert capture.time_range() == (pytest.approx(T0 + 0.25), pytest.approx(T0 + 2))
+
+    # The start is inclusive and the end exclusive
+    assert [e["kind"] for e in capture.query(T0 + 0.25, T0 + 2)] == ["udp"]
+    assert [e["kind"] for e in capture.query(T0 + 0.25, T0 + 2.001)] == ["udp", "tcp"]
+    assert [e["kind"] for e in capture.query(T0 + 0.26)] == ["tcp"]
+    assert [e["kind"] for e in capture.query(end=T0 + 0.25)] == []
+    assert [e["kind"] for e in capture.query(limit=1)] == ["udp"]
+    assert capture.query(T0 + 3, T0 + 10) == []
+
+def test_index_keeps_devices(tmp_path):
+    capture = index("le_advertisement.btsnoop", tmp_path)
+    assert capture.index["device"].tolist() == [b"AA:BB:CC:DD:EE:FF", b"handle 0x001"]
+    assert capture.read(1)["kind"] == "acl_data"
+    capture.close()
+
+def test_query_rows_match_iter_events(tmp_path):
+    capture = index("le_advertisement.btsnoop", tmp_path)
+    assert capture.query() == list(iter_events(fixture("le_advertisement.btsnoop")))
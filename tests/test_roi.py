@@ -0,0 +1,45 @@
+import numpy as np
+from roi import RegionOfInterest
+
+def test_rect_crop_and_offset():
+    frame = np.arange(100 * 200 * 3, dtype=np.uint32).reshape(100, 200, 3)
+    crop, offset = RegionOfInterest({"rects": [[0.5, 0.25, 0.25, 0.5]]}).apply(frame)
+    assert offset == (100, 25)
+    assert crop.shape == (50, 50, 3)
+    assert (crop == frame[25:75, 100:150]).all()
+
+def test_polygon_is_masked():
+    frame = np.full((100, 100), 7, dtype=np.uint8)
+    roi = RegionOfInterest({"polygons": [[[0.0, 0.0], [1.0, 0.0], [0.0, 1.0]]]})
+    crop, offset = roi.apply(frame)
+    assert offset == (0, 0)
+    assert crop[5, 5] == 7 and crop[95, 95] == 0
+
+def test_region_empty_at_frame_size_falls_back_to_full_frame():
+    frame = np.ones((48, 64), dtype=np.uint8)
+    roi = RegionOfInterest({"rects": [[0.5, 0.5, 0.001, 0.001]]})
+    crop, offset = roi.apply(frame)
+    assert offset == (0, 0)
+    assert crop.shape == frame.shape
+
+    # The box is rebuilt when the frame size changes
+    crop, offset = roi.apply(np.ones((4000, 6000), dtype=np.uint8))
+    assert offset == (3000, 2000)
+    assert crop.shape == (4, 6)
+
+def test_region_thinner_than_minimum_falls_back_to_full_frame():
+    import cv2
+
+    frame = np.ones((720, 1280, 3), dtype=np.uint8)
+    # Valid as fractions, but only 1 px wide at 1280: halving it for detection would fail
+    crop, offset = RegionOfInterest({"rects": [[0.5, 0.5, 0.0008, 0.5]]}).apply(frame)
+    assert offset == (0, 0)
+    assert crop.shape == frame.shape
+    assert cv2.resize(crop, (0, 0), fx=0.5, fy=0.5).shape == (360, 640, 3)
+
+    # Regions smaller than the detector's minimum window are ignored as well
+    roi = RegionOfInterest({"rects": [[0.5, 0.5, 0.05, 0.05]]}, min_size=(80, 30))
+    crop, offset = roi.apply(frame)
+    assert offset == (0, 0) and crop.shape == frame.shape
+    crop, offset = roi.apply(np.ones((2160, 3840, 3), dtype=np.uint8))
+    assert offset == (1920, 1080) and crop.shape == (108, 192, 3)
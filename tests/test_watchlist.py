@@ -0,0 +1,49 @@
+import pytest
+from watchlist import CONFUSION_COST, Watchlist, canonical_plate
+
+def make_watchlist():
+    watchlist = Watchlist(max_distance=1)
+    watchlist.add("MH12 AB 1234", "stolen")
+    watchlist.add("KA01-XY-9876")
+    return watchlist
+
+def test_exact_match_ignores_spacing_and_case():
+    matches = make_watchlist().match("mh12ab1234")
+    assert matches == [{"plate": "MH12AB1234", "info": "stolen", "distance": 0, "edit_distance": 0, "exact": True}]
+
+def test_ocr_confusions_cost_a_fraction():
+    assert canonical_plate("MHI2 A8 1234") == canonical_plate("MH12 AB 1234")
+    match = make_watchlist().match("MHI2 A8 1234")[0]
+    assert match["plate"] == "MH12AB1234"
+    assert match["distance"] == pytest.approx(2 * CONFUSION_COST)
+    assert match["edit_distance"] == 2
+    assert not match["exact"]
+
+def test_only_named_confusions_are_folded():
+    watchlist = Watchlist(max_distance=1)
+    watchlist.add("OD01AB1234")
+    # D/O are different letters: one full edit, never reported as exact
+    match = watchlist.match("DD01AB1234")[0]
+    assert match["distance"] == 1 and not match["exact"]
+    assert canonical_plate("S5Z2G6QL") == "S5Z2G6QL"
+
+def test_one_edit_matches_two_do_not():
+    watchlist = make_watchlist()
+    assert watchlist.match("MH12AB124")[0]["distance"] == 1     # Missing character
+    assert watchlist.match("MH12AB12345")[0]["distance"] == 1   # Extra character
+    assert watchlist.match("MH12AC1234")[0]["distance"] == 1    # Substitution
+    assert watchlist.match("MH12AC124") == []
+    assert watchlist.match("MHI2AC1234") == []                  # Confusion on top of a full edit
+
+def test_no_match_and_empty_text():
+    watchlist = make_watchlist()
+    assert watchlist.match("TN09ZZ0001") == []
+    assert watchlist.match("") == []
+    assert watchlist.match("--") == []
+
+def test_load_skips_header(tmp_path):
+    path = tmp_path / "watchlist.csv"
+    path.write_text("plate,info\nMH12AB1234,stolen, red car\n\nKA01XY9876\n")
+    watchlist = Watchlist.load(str(path))
+    assert len(watchlist) == 2
+    assert watchlist.match("MH12AB1234")[0]["info"] == "stolen, red car"
@@ -0,0 +1,135 @@
+import csv
+import os
+
+# Characters Tesseract commonly mistakes for one another on plates. Each pair is folded
+# onto one canonical character to find candidates, and a substitution between them
+# costs CONFUSION_COST instead of a full edit, so folded matches stay distinguishable
+OCR_CONFUSIONS = {
+    "O": "0",
+    "I": "1",
+    "B": "8",
+}
+CONFUSION_COST = 0.25
+
+def normalize_plate(text):
+    """Uppercase a plate and drop spaces, dashes and other non-alphanumerics."""
+    return "".join(c for c in text.upper() if c.isalnum())
+
+def canonical_plate(text):
+    """Normalise a plate and fold OCR-confusable characters together."""
+    return "".join(OCR_CONFUSIONS.get(c, c) for c in normalize_plate(text))
+
+def edit_distance(a, b, max_distance=None, confusion_cost=1.0):
+    """
+    Levenshtein distance between two strings.
+
+    Substituting one OCR-confusable character for its partner (see OCR_CONFUSIONS)
+    costs confusion_cost; every other edit costs 1. Stops early and returns
+    max_distance + 1 once the distance is known to exceed it.
+    """
+    if max_distance is not None and abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            if ca == cb:
+                substitution = 0
+            elif OCR_CONFUSIONS.get(ca, ca) == OCR_CONFUSIONS.get(cb, cb):
+                substitution = confusion_cost
+            else:
+                substitution = 1
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + substitution))
+        if max_distance is not None and min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+def _deletions(text, depth):
+    """All strings obtained by deleting up to `depth` characters from text."""
+    variants = {text}
+    frontier = {text}
+    for _ in range(depth):
+        frontier = {v[:i] + v[i + 1:] for v in frontier for i in range(len(v))}
+        variants |= frontier
+    return variants
+
+class Watchlist:
+    """
+    Index of wanted plates tolerant to OCR errors.
+
+    Plates are indexed in canonical form (see OCR_CONFUSIONS), so O/0, I/1 and B/8
+    mix-ups are found, and each candidate is scored with an edit distance in which
+    those mix-ups cost CONFUSION_COST. Lookups use a deletion-neighbourhood index:
+    every canonical plate is stored under all its variants with up to `max_distance`
+    characters deleted, so a query only needs a handful of dictionary lookups and
+    verifies the few candidates it finds, independent of how many plates are on the list.
+    """
+
+    def __init__(self, max_distance=1):
+        self.max_distance = max_distance
+        self.entries = {}   # canonical plate -> list of (plate, info)
+        self._index = {}    # deletion variant -> set of canonical plates
+
+    def __len__(self):
+        return sum(len(entries) for entries in self.entries.values())
+
+    def add(self, plate, info=""):
+        key = canonical_plate(plate)
+        if not key:
+            return
+        if key not in self.entries:
+            self.entries[key] = []
+            for variant in _deletions(key, self.max_distance):
+                self._index.setdefault(variant, set()).add(key)
+        self.entries[key].append((normalize_plate(plate), info))
+
+    @classmethod
+    def load(cls, path, max_distance=1):
+        """
+        Load a watchlist file: one plate per line, or CSV with the plate in the first
+        column and an optional description in the rest. A "plate" header row is skipped.
+        """
+        watchlist = cls(max_distance=max_distance)
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.reader(f):
+                if not row or not row[0].strip() or row[0].strip().lower() == "plate":
+                    continue
+                watchlist.add(row[0], ", ".join(field.strip() for field in row[1:] if field.strip()))
+        return watchlist
+
+    def match(self, text):
+        """
+        Find watchlist plates within max_distance of an OCR result.
+
+        Returns:
+            list: Dicts with plate, info, distance (OCR confusions weighted by
+                  CONFUSION_COST), edit_distance (every differing character counted)
+                  and exact (the text reads as the plate), closest first
+        """
+        key = canonical_plate(text)
+        if not key:
+            return []
+        read = normalize_plate(text)
+
+        # Confusions cost less than a full edit, so a plate within max_distance is always
+        # within max_distance of the query once both are folded
+        candidates = set()
+        for variant in _deletions(key, self.max_distance):
+            candidates |= self._index.get(variant, set())
+
+        matches = []
+        for candidate in candidates:
+            for plate, info in self.entries[candidate]:
+                distance = edit_distance(read, plate, self.max_distance, confusion_cost=CONFUSION_COST)
+                if distance <= self.max_distance:
+                    matches.append({"plate": plate, "info": info, "distance": distance,
+                                    "edit_distance": edit_distance(read, plate), "exact": read == plate})
+        matches.sort(key=lambda m: (m["distance"], m["plate"]))
+        return matches
+
+def load_watchlist(path, max_distance=1):
+    """Load a watchlist if the file exists, otherwise return None."""
+    if not path or not os.path.exists(path):
+        return None
+    return Watchlist.load(path, max_distance=max_distance)